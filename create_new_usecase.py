@@ -7,16 +7,10 @@ parameters file that can be filled-in to run a new profiling
 """
 
 import argparse
-import json
 import shutil
 from pathlib import Path
 
-from src.generate_notebooks import (
-    NOTEBOOK_TEMPLATE_FILENAME,
-    OUTPUT_DIR_PATH,
-    PARAMS_FILENAME,
-)
-from src.utils import set_logger
+import orjson
 
 USECASES_DIR_PATH: Path = Path(__file__).parent / "usecases"
 
@@ -52,6 +46,14 @@ if __name__ == "__main__":
     # Parse arguments
     _args: argparse.Namespace = parser.parse_args()
 
+    # Import the heavy dependencies only once the arguments are successfully parsed
+    from src.generate_notebooks import (
+        NOTEBOOK_TEMPLATE_FILENAME,
+        OUTPUT_DIR_PATH,
+        PARAMS_FILENAME,
+    )
+    from src.utils import set_logger
+
     # Set logger with given log_level and log_file
     set_logger(log_level=_args.log_level, log_file=_args.log_file)
 
@@ -68,12 +70,10 @@ if __name__ == "__main__":
     new_usecase_dir_path.mkdir(parents=True)
 
     try:
-        # Create empty template.ipynb and params.json files
+        # Create the template.ipynb file from the example template
         notebook_template_path: Path = new_usecase_dir_path / NOTEBOOK_TEMPLATE_FILENAME
         example_template_path: Path = USECASES_DIR_PATH / "example_template.ipynb"
-        shutil.copy(
-            USECASES_DIR_PATH / "example_template.ipynb", notebook_template_path
-        )
+        notebook_template_path.write_bytes(example_template_path.read_bytes())
 
         # Create example params.json file
         params_path: Path = new_usecase_dir_path / PARAMS_FILENAME
@@ -82,8 +82,11 @@ if __name__ == "__main__":
             "paramB_value": ["x", "y", "z"],
             "paramC_value": [True, False],
         }
-        with params_path.open(mode="w", encoding="utf-8") as params_file:
-            json.dump(example_params, params_file, indent=4)
+        params_path.write_bytes(
+            orjson.dumps(
+                example_params, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+            )
+        )
 
         # Create notebooks output directory
         notebooks_dir_path: Path = new_usecase_dir_path / OUTPUT_DIR_PATH
@@ -91,10 +94,5 @@ if __name__ == "__main__":
         (notebooks_dir_path / ".keep").touch()
     except Exception as e:
         # Clean up by removing the created use case directory
-        for child in new_usecase_dir_path.rglob("*"):
-            if child.is_file():
-                child.unlink()
-            else:
-                child.rmdir()
-        new_usecase_dir_path.rmdir()
+        shutil.rmtree(new_usecase_dir_path, ignore_errors=True)
         raise e
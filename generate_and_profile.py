@@ -4,9 +4,6 @@ import argparse
 from pathlib import Path
 from typing import Any
 
-from src.generate_and_profile import generate_and_profile
-from src.utils import set_logger
-
 if __name__ == "__main__":
     parser: argparse.ArgumentParser = argparse.ArgumentParser(
         description=(
@@ -49,7 +46,6 @@ if __name__ == "__main__":
         help="Whether to run in headless mode (default: False).",
         action=argparse.BooleanOptionalAction,
         required=False,
-        type=bool,
         default=False,
     )
     parser.add_argument(
@@ -59,12 +55,42 @@ if __name__ == "__main__":
         type=int,
         default=300,
     )
+    parser.add_argument(
+        "--block_resources",
+        help=(
+            "Whether to block the fonts and media requests of the notebook page "
+            "(default: False)."
+        ),
+        action=argparse.BooleanOptionalAction,
+        required=False,
+        default=False,
+    )
+    parser.add_argument(
+        "--pipeline_depth",
+        help=(
+            "Number of cells not waiting for viz changes queued for execution while "
+            "the previous cells are still executing (default: 0)."
+        ),
+        required=False,
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--keep_notebook",
+        help=(
+            "Whether to keep the uploaded notebooks in the JupyterLab instance, so "
+            "that the next runs do not upload them again while unchanged "
+            "(default: False)."
+        ),
+        action=argparse.BooleanOptionalAction,
+        required=False,
+        default=False,
+    )
     parser.add_argument(
         "--log_screenshots",
         help="Whether to log screenshots or not (default: False).",
         action=argparse.BooleanOptionalAction,
         required=False,
-        type=bool,
         default=False,
     )
     parser.add_argument(
@@ -72,9 +98,25 @@ if __name__ == "__main__":
         help="Whether to save profiling metrics to a CSV file (default: False).",
         action=argparse.BooleanOptionalAction,
         required=False,
-        type=bool,
         default=False,
     )
+    parser.add_argument(
+        "--concurrency",
+        help="Max number of notebooks to profile concurrently (default: 1).",
+        required=False,
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--gen_workers",
+        help=(
+            "Number of worker processes generating the notebooks (default: 1, "
+            "notebooks are generated in the main process)."
+        ),
+        required=False,
+        type=int,
+        default=1,
+    )
     parser.add_argument(
         "--log_file",
         help="Path to the log file.",
@@ -94,6 +136,10 @@ if __name__ == "__main__":
     # Parse arguments
     _args: argparse.Namespace = parser.parse_args()
 
+    # Import the heavy dependencies only once the arguments are successfully parsed
+    from src.generate_and_profile import generate_and_profile
+    from src.utils import set_logger
+
     # Set logger with given log_level and log_file
     set_logger(log_level=_args.log_level, log_file=_args.log_file)
 
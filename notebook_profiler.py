@@ -4,9 +4,6 @@ import argparse
 from pathlib import Path
 from typing import Any
 
-from src.profile_notebook import profile_notebook
-from src.utils import ProfilerContext, set_logger
-
 if __name__ == "__main__":
     parser: argparse.ArgumentParser = argparse.ArgumentParser(
         description=(
@@ -46,7 +43,6 @@ if __name__ == "__main__":
         help="Whether to run in headless mode (default: False).",
         action=argparse.BooleanOptionalAction,
         required=False,
-        type=bool,
         default=False,
     )
     parser.add_argument(
@@ -56,6 +52,36 @@ if __name__ == "__main__":
         type=int,
         default=300,
     )
+    parser.add_argument(
+        "--block_resources",
+        help=(
+            "Whether to block the fonts and media requests of the notebook page "
+            "(default: False)."
+        ),
+        action=argparse.BooleanOptionalAction,
+        required=False,
+        default=False,
+    )
+    parser.add_argument(
+        "--pipeline_depth",
+        help=(
+            "Number of cells not waiting for viz changes queued for execution while "
+            "the previous cells are still executing (default: 0)."
+        ),
+        required=False,
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--keep_notebook",
+        help=(
+            "Whether to keep the uploaded notebook in the JupyterLab instance, so that "
+            "the next runs do not upload it again while unchanged (default: False)."
+        ),
+        action=argparse.BooleanOptionalAction,
+        required=False,
+        default=False,
+    )
     parser.add_argument(
         "--screenshots_dir_path",
         help=(
@@ -104,6 +130,10 @@ if __name__ == "__main__":
     # Parse arguments
     _args: argparse.Namespace = parser.parse_args()
 
+    # Import the heavy dependencies only once the arguments are successfully parsed
+    from src.profile_notebook import profile_notebook
+    from src.utils import ProfilerContext, set_logger
+
     # Set logger with given log_level and log_file
     set_logger(log_level=_args.log_level, log_file=_args.log_file)
 
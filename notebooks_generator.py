@@ -4,9 +4,6 @@ import argparse
 from pathlib import Path
 from typing import Any
 
-from src.generate_notebooks import generate_notebooks
-from src.utils import set_logger
-
 if __name__ == "__main__":
     parser: argparse.ArgumentParser = argparse.ArgumentParser(
         description=(
@@ -29,6 +26,16 @@ if __name__ == "__main__":
         type=str,
         default="python3",
     )
+    parser.add_argument(
+        "--gen_workers",
+        help=(
+            "Number of worker processes generating the notebooks (default: 1, "
+            "notebooks are generated in the main process)."
+        ),
+        required=False,
+        type=int,
+        default=1,
+    )
     parser.add_argument(
         "--log_file",
         help="Path to the log file.",
@@ -48,6 +55,10 @@ if __name__ == "__main__":
     # Parse arguments
     _args: argparse.Namespace = parser.parse_args()
 
+    # Import the heavy dependencies only once the arguments are successfully parsed
+    from src.generate_notebooks import generate_notebooks
+    from src.utils import set_logger
+
     # Set logger with given log_level and log_file
     set_logger(log_level=_args.log_level, log_file=_args.log_file)
 
@@ -57,4 +68,5 @@ if __name__ == "__main__":
     del _kwargs["log_file"]
 
     # Generate notebooks with the given arguments
-    generate_notebooks(**_kwargs)
+    for _ in generate_notebooks(**_kwargs):
+        pass
@@ -1,13 +1,11 @@
 import logging
-import re
 import warnings
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from os import linesep
 from typing import TYPE_CHECKING, Any, ClassVar
 
 import psutil
-from selenium.webdriver.common.by import By
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.remote.webelement import WebElement
 from tqdm import TqdmWarning, tqdm
@@ -36,14 +34,20 @@ class ExecutableCell:
     wait_for_viz: bool
     profiler: "Profiler"
     execution_start_time: float = 0
+    queued: bool = False
     done_found: bool = False
+    # The kernel usage captured with the last metrics, not yet checked for restarts
+    captured_kernel_usage: dict[str, Any] | None = field(
+        default=None, repr=False, init=False
+    )
     metrics: CellMetrics = field(default_factory=CellMetrics, repr=False, init=False)
 
     # Seconds to wait after the execution command if no need to
     # collect profiling metrics
     SECONDS_TO_WAIT_IF_SKIP_PROFILING: ClassVar[float] = 2.5
 
-    # Seconds to wait before checking the executed cell outputs
+    # Max seconds to wait for the DONE statement in the executed cell outputs, per
+    # execution status check
     WAIT_TIME_BEFORE_OUTPUT_CHECK: ClassVar[float] = 0.5
 
     # Selector for all output cells in a code cell
@@ -54,8 +58,60 @@ class ExecutableCell:
         ".lm-Widget.jp-RenderedText.jp-mod-trusted.jp-OutputArea-output"
     )
 
-    # Regex to identify the cell output containing the `DONE` text output
-    OUTPUT_CELL_DONE_REGEX: ClassVar[str] = r"^.*(?P<DONE>DONE).*$"
+    # The text identifying the cell output containing the `DONE` text output
+    OUTPUT_CELL_DONE_TEXT: ClassVar[str] = "DONE"
+
+    # Asynchronous script waiting, in the page, for a text output of a code cell to
+    # contain the DONE text, and passing true to the callback as soon as it does,
+    # or, once the timeout (in seconds) has expired, false, or null if the code cell
+    # has no output cells yet
+    OUTPUT_DONE_SCRIPT: ClassVar[str] = """
+        const [
+            cell,
+            outputCellsSelector,
+            textOutputCellsSelector,
+            doneText,
+            timeout,
+            callback,
+        ] = arguments;
+        const findDone = () => {
+            if (!cell.querySelector(outputCellsSelector)) {
+                return null;
+            }
+            // The text content does not need the layout to be computed, unlike the
+            // inner text, and the lookup stops at the first DONE text found
+            for (const textOutputCell of cell.querySelectorAll(
+                `${outputCellsSelector} ${textOutputCellsSelector}`,
+            )) {
+                if (textOutputCell.textContent.includes(doneText)) {
+                    return true;
+                }
+            }
+            return false;
+        };
+        const doneFound = findDone();
+        if (doneFound || timeout <= 0) {
+            callback(doneFound);
+            return;
+        }
+        // Look for the DONE text again whenever the cell outputs change
+        const observer = new MutationObserver(() => {
+            if (findDone()) {
+                observer.disconnect();
+                clearTimeout(timer);
+                callback(true);
+            }
+        });
+        const timer = setTimeout(() => {
+            observer.disconnect();
+            callback(findDone());
+        }, timeout * 1000);
+        observer.observe(cell, {
+            subtree: true,
+            childList: true,
+            characterData: true,
+        });
+    """
 
     def __post_init__(self):
         """Post-initialization to set the cell index in performance metrics."""
@@ -69,7 +125,7 @@ class ExecutableCell:
         Exception
             If the kernel PID cannot be retrieved before execution.
         """
-        logger.info(f"Start execution of cell {self.index}.")
+        logger.info("Start execution of cell %s.", self.index)
 
         # Set kernel PID at the beginning of execution
         kernel_pid: int | None = self.profiler.get_current_kernel_pid()
@@ -86,15 +142,13 @@ class ExecutableCell:
             position=0,
         )
 
-        # Set execution start time
-        self.execution_start_time: float = elapsed_time()
-        # Click on the cell
-        self.cell.click()
-        # Execute the cell
-        self.cell.send_keys(Keys.SHIFT, Keys.ENTER)
-
-        # Set initial execution status to IN_PROGRESS
-        self.metrics.execution_status = CellExecutionStatus.IN_PROGRESS
+        if self.queued:
+            # The kernel starts running a queued cell once the previous cells have
+            # completed: count its execution time from now on
+            self.execution_start_time = elapsed_time()
+        else:
+            # Send the execution command of the cell
+            self.queue()
 
         # Used to skip the first metrics capture
         first_iter: bool = True
@@ -114,7 +168,24 @@ class ExecutableCell:
         self.metrics.compute()
 
         # Log the performance metrics
-        logger.info(str(self.metrics))
+        logger.info("%s", self.metrics)
+
+    def queue(self) -> None:
+        """
+        Send the execution command of the cell, the kernel running it once the
+        cells executed before have completed.
+        """
+        # Set execution start time
+        self.execution_start_time = elapsed_time()
+        # Click on the cell and execute it, in a single actions request
+        actions: ActionChains = ActionChains(self.profiler.driver)
+        actions.click(self.cell)
+        actions.key_down(Keys.SHIFT).send_keys(Keys.ENTER).key_up(Keys.SHIFT)
+        actions.perform()
+        self.queued = True
+
+        # Set initial execution status to IN_PROGRESS
+        self.metrics.execution_status = CellExecutionStatus.IN_PROGRESS
 
     def check_execution_status(self, kernel_pid: int, progress_bar: tqdm) -> None:
         """
@@ -132,49 +203,65 @@ class ExecutableCell:
         # Check for timeout, if time has expired, we're done
         if (et := elapsed_time(self.execution_start_time)) > self.max_wait_time:
             self.metrics.execution_status = CellExecutionStatus.TIMED_OUT
-            logger.warning(f"Cell {self.index} execution stopped after {et} seconds.")
+            logger.warning(
+                "Cell %s execution stopped after %s seconds.", self.index, et
+            )
             return
 
-        # Check if the kernel has restarted, if yes, we're done
-        if kernel_pid != self.profiler.get_current_kernel_pid():
+        # Check if the kernel has restarted, if yes, we're done. The kernel usage
+        # just captured with the metrics, if any, already holds the kernel PID
+        kernel_usage: dict[str, Any] = (
+            self.captured_kernel_usage or self.profiler.get_kernel_usage()
+        )
+        self.captured_kernel_usage = None
+        if kernel_pid != kernel_usage.get("pid"):
             self.metrics.execution_status = CellExecutionStatus.FAILED
             logger.warning(
-                f"Cell {self.index} execution has been interrupted due to a "
-                "kernel restart."
+                "Cell %s execution has been interrupted due to a kernel restart.",
+                self.index,
             )
             return
 
-        # Wait a bit before checking
-        explicit_wait(self.WAIT_TIME_BEFORE_OUTPUT_CHECK)
-
-        # Update progress bar
-        progress_bar.update(round(elapsed_time(while_elapsed_time)))
-        while_elapsed_time = elapsed_time()
-
-        # Check if the DONE statement has been found, if not try to find it
+        # Check if the DONE statement has been found, if not wait a bit for it, and
+        # move on right away to the next checks once found
         if not self.done_found:
-            logger.debug(f"Cell {self.index} DONE statement not found yet.")
-            self.find_done_statement()
-            return
+            logger.debug("Cell %s DONE statement not found yet.", self.index)
+            if not self.find_done_statement(self.WAIT_TIME_BEFORE_OUTPUT_CHECK):
+                # Update progress bar
+                progress_bar.update(round(elapsed_time(while_elapsed_time)))
+                return
 
         # If we don't need to wait for viz changes, we are done
         if not self.wait_for_viz:
-            logger.debug(f"Cell {self.index} is not waiting for viz changes.")
+            logger.debug("Cell %s is not waiting for viz changes.", self.index)
             self.metrics.execution_status = CellExecutionStatus.COMPLETED
             return
 
-        logger.debug(f"Cell {self.index} has to wait for viz changes.")
+        logger.debug("Cell %s has to wait for viz changes.", self.index)
+
+        if not self.profiler.viz_element:
+            # Look for the viz element in the page, waiting a bit for it to be
+            # rendered so that its stability can be checked right away
+            logger.debug("Looking for the viz element in the page...")
+            self.profiler.detect_viz_element(self.WAIT_TIME_BEFORE_OUTPUT_CHECK)
 
         # Check if the viz element is stable
         viz_is_stable: bool = False
-        if self.profiler.viz_element:
+        if not self.profiler.viz_element or self.profiler.is_kernel_busy():
+            # The viz element cannot be stable while not rendered yet, nor while the
+            # kernel is still updating it: skip the screenshots, and wait a bit
+            # before the next check, for the rest of the time not already spent
+            # looking for the viz element
+            logger.debug("The viz element is not rendered yet or the kernel is busy.")
+            remaining_time: float = self.WAIT_TIME_BEFORE_OUTPUT_CHECK - elapsed_time(
+                while_elapsed_time
+            )
+            if remaining_time > 0:
+                explicit_wait(remaining_time)
+        else:
             # If we have the viz element, check if it's stable
-            logger.debug("We already have the viz element, checking if it's stable.")
+            logger.debug("We have the viz element, checking if it's stable.")
             viz_is_stable = self.profiler.viz_element.is_stable(self.index)
-        else:
-            # Look for the viz element in the page
-            logger.debug("Looking for the viz element in the page...")
-            self.profiler.detect_viz_element()
 
         # Update progress bar
         progress_bar.update(round(elapsed_time(while_elapsed_time)))
@@ -182,7 +269,7 @@ class ExecutableCell:
         # Loop exit check: if the viz is stable, we are done
         if viz_is_stable:
             self.metrics.execution_status = CellExecutionStatus.COMPLETED
-            logger.debug(f"Cell {self.index} viz element is stable.")
+            logger.debug("Cell %s viz element is stable.", self.index)
 
     @staticmethod
     def finalize_progress_bar(progress_bar: tqdm) -> None:
@@ -193,12 +280,9 @@ class ExecutableCell:
         progress_bar : tqdm
             The progress bar to finalize.
         """
-        # Complete the progress bar smoothly
-        steps: int = 10
-        step: float = (progress_bar.total - progress_bar.n) / steps
-        for _ in range(steps):
-            explicit_wait(0.05)
-            progress_bar.update(step)
+        # Complete the progress bar at once, rather than animating it, which would
+        # delay the execution of the next cell
+        progress_bar.update(progress_bar.total - progress_bar.n)
         progress_bar.close()
 
     def capture_metrics(self) -> None:
@@ -224,6 +308,7 @@ class ExecutableCell:
 
         # Get kernel usage metrics only if present
         kernel_usage: dict[str, Any] = self.profiler.get_kernel_usage()
+        self.captured_kernel_usage = kernel_usage
         if "kernel_cpu" in kernel_usage and "host_virtual_memory" in kernel_usage:
             # Capture kernel CPU usage
             self.metrics.kernel_cpu_list.append(kernel_usage["kernel_cpu"])
@@ -233,8 +318,9 @@ class ExecutableCell:
             )
         else:
             logger.warning(
-                f"Kernel usage metrics not available for cell {self.index}, "
-                "skipping kernel metrics capture."
+                "Kernel usage metrics not available for cell %s, "
+                "skipping kernel metrics capture.",
+                self.index,
             )
 
         # Capture client data received from the profiler only when
@@ -247,34 +333,41 @@ class ExecutableCell:
             self.metrics.client_total_data_received = (
                 self.profiler.get_client_data_received(timestamp_start, timestamp_end)
             )
-        logger.debug(f"Cell {self.index} metrics captured.")
+        logger.debug("Cell %s metrics captured.", self.index)
 
-    def find_done_statement(self) -> None:
-        """Look for the DONE statement in the output cells of the executed cell."""
-        output_cells: list[WebElement] = self.cell.find_elements(
-            By.CSS_SELECTOR, self.OUTPUT_CELLS_SELECTOR
+    def find_done_statement(self, timeout: float = 0) -> bool:
+        """
+        Look for the DONE statement in the output cells of the executed cell, waiting
+        for it up to the given timeout, and returning as soon as it is found. The
+        cell outputs are observed in the page, in a single round trip, rather than
+        polled.
+        Parameters
+        ----------
+        timeout : float, optional
+            Max seconds to wait for the DONE statement (default: 0, a single
+            lookup).
+        Returns
+        -------
+        bool
+            True if the DONE statement has been found, False otherwise.
+        """
+        # Look for the DONE text in the text outputs, without transferring the
+        # outputs
+        done_found: bool | None = self.profiler.driver.execute_async_script(
+            self.OUTPUT_DONE_SCRIPT,
+            self.cell,
+            self.OUTPUT_CELLS_SELECTOR,
+            self.OUTPUT_CELLS_TEXT_SELECTOR,
+            self.OUTPUT_CELL_DONE_TEXT,
+            timeout,
         )
-        if not output_cells:
-            logger.debug(f"Cell {self.index} has no output cells yet, waiting...")
-            return
-        for output_cell in output_cells:
-            text_output_cells: list[WebElement] = output_cell.find_elements(
-                By.CSS_SELECTOR, self.OUTPUT_CELLS_TEXT_SELECTOR
-            )
-            logger.debug(f"Found {len(text_output_cells)} text output cells.")
-            if not text_output_cells:
-                continue
-            output_txt: str = linesep.join(
-                [text_output_cell.text for text_output_cell in text_output_cells]
-            )
-            match: re.Match | None = re.search(
-                self.OUTPUT_CELL_DONE_REGEX, output_txt, re.MULTILINE
-            )
-            if match and match.group("DONE"):
-                logger.info(f"Cell {self.index} DONE statement found.")
-                self.done_found = True
-                # Save kernel time elapsed
-                self.metrics.kernel_execution_time = elapsed_time(
-                    self.execution_start_time
-                )
-                return
+        if done_found is None:
+            logger.debug("Cell %s has no output cells yet, waiting...", self.index)
+            return False
+        if not done_found:
+            return False
+        logger.info("Cell %s DONE statement found.", self.index)
+        self.done_found = True
+        # Save kernel time elapsed
+        self.metrics.kernel_execution_time = elapsed_time(self.execution_start_time)
+        return True
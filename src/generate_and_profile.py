@@ -1,13 +1,21 @@
 import logging
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import replace
 from pathlib import Path
+from queue import Empty, SimpleQueue
 from time import gmtime, perf_counter_ns, strftime
 from typing import Any
 
+from selenium.webdriver import Chrome
 from tqdm import tqdm
 from tqdm.contrib.logging import logging_redirect_tqdm
 
-from src.generate_notebooks import generate_notebooks
+from src.generate_notebooks import count_notebooks, generate_notebooks
+from src.jupyterlab_helper import JupyterLabHelper
 from src.profile_notebook import profile_notebook
+from src.profiler import Profiler
 from src.utils import ProfilerContext, get_logger
 
 # Initialize logger
@@ -21,8 +29,13 @@ def generate_and_profile(
     kernel_name: str,
     headless: bool,
     max_wait_time: int,
+    block_resources: bool = False,
+    pipeline_depth: int = 0,
+    keep_notebook: bool = False,
     log_screenshots: bool = False,
     save_metrics: bool = False,
+    concurrency: int = 1,
+    gen_workers: int = 1,
 ) -> None:
     """
     Generate profiler notebooks from a template and run the profiler on them.
@@ -40,26 +53,56 @@ def generate_and_profile(
         Whether to run in headless mode.
     max_wait_time : int
         Max time to wait after executing each cell (in seconds).
+    block_resources : bool, optional
+        Whether to block the fonts and media requests of the notebook pages
+        (default: False).
+    pipeline_depth : int, optional
+        Number of cells not waiting for viz changes queued for execution while
+        the previous cells are still executing (default: 0, the cells are executed
+        one at a time).
+    keep_notebook : bool, optional
+        Whether to keep the uploaded notebooks in the JupyterLab instance after
+        profiling, so that the next runs do not upload them again while unchanged
+        (default: False).
     log_screenshots : bool, optional
         Whether to log screenshots or not (default: False).
     save_metrics : bool, optional
         Whether to save profiling metrics to a CSV file (default: False).
+    concurrency : int, optional
+        Max number of notebooks to profile concurrently (default: 1). Note that
+        concurrent runs share the client and the JupyterLab host resources, hence
+        their performance metrics affect each other.
+    gen_workers : int, optional
+        Number of worker processes generating the notebooks (default: 1).
     """
     logger.debug(
         "Generating and profiling notebooks with "
-        f"Input Directory Path: {input_dir_path} -- "
-        f"URL: {url} -- "
-        f"Token: {token} -- "
-        f"Kernel Name: {kernel_name} -- "
-        f"Headless: {headless} -- "
-        f"Max Wait Time: {max_wait_time} -- "
-        f"Log Screenshots: {log_screenshots} -- "
-        f"Save Metrics: {save_metrics}"
-    )
-
-    # Generate notebooks from template
-    nb_input_paths: list[Path] = generate_notebooks(
-        input_dir_path=input_dir_path, kernel_name=kernel_name
+        "Input Directory Path: %s -- "
+        "URL: %s -- "
+        "Token: %s -- "
+        "Kernel Name: %s -- "
+        "Headless: %s -- "
+        "Max Wait Time: %s -- "
+        "Block Resources: %s -- "
+        "Pipeline Depth: %s -- "
+        "Keep Notebook: %s -- "
+        "Log Screenshots: %s -- "
+        "Save Metrics: %s -- "
+        "Concurrency: %s -- "
+        "Generation Workers: %s",
+        input_dir_path,
+        url,
+        token,
+        kernel_name,
+        headless,
+        max_wait_time,
+        block_resources,
+        pipeline_depth,
+        keep_notebook,
+        log_screenshots,
+        save_metrics,
+        concurrency,
+        gen_workers,
     )
 
     # Set up the partial context for the `profile_notebook` call
@@ -69,23 +112,26 @@ def generate_and_profile(
         kernel_name=kernel_name,
         headless=headless,
         max_wait_time=max_wait_time,
+        block_resources=block_resources,
+        pipeline_depth=pipeline_depth,
+        keep_notebook=keep_notebook,
     )
 
+    # Name of the directories of the day in where the screenshots and the metrics
+    # will be saved, computed once so that they match
+    date_dir_name: str = strftime("%Y_%m_%d", gmtime())
+
     if log_screenshots:
         # Create the directory(ies), if not yet created, in where the screenshots
         # will be saved. e.g.: <input_dir_path>/screenshots/<YYYY_MM_DD>/
-        screenshots_dir_path: Path = (
-            input_dir_path / "screenshots" / strftime("%Y_%m_%d", gmtime())
-        )
+        screenshots_dir_path: Path = input_dir_path / "screenshots" / date_dir_name
         screenshots_dir_path.mkdir(parents=True, exist_ok=True)
         profiler_context.screenshots_dir_path = screenshots_dir_path
 
     if save_metrics:
         # Create the directory(ies), if not yet created, in where the metrics
         # will be saved. e.g.: <input_dir_path>/metrics/<YYYY_MM_DD>/
-        metrics_dir_path: Path = (
-            input_dir_path / "metrics" / strftime("%Y_%m_%d", gmtime())
-        )
+        metrics_dir_path: Path = input_dir_path / "metrics" / date_dir_name
         metrics_dir_path.mkdir(parents=True, exist_ok=True)
 
         # Create the file(s) in where the metrics will be saved.
@@ -99,15 +145,135 @@ def generate_and_profile(
 
     # Set up progress bar arguments
     progress_bar_kwargs: dict[str, Any] = {
-        "iterable": nb_input_paths,
         "desc": "Profiling Notebooks Progress",
         "position": 2,
         "leave": False,
     }
 
-    # Profile each generated notebook
-    with logging_redirect_tqdm([logger]):
-        for nb_input_path in tqdm(**progress_bar_kwargs):
-            logger.info(f"Profiling notebook: {nb_input_path}")
-            profiler_context.nb_input_path = nb_input_path
-            profile_notebook(profiler_context)
+    # JupyterLab helper shared by the profiling runs, so that the connections to the
+    # JupyterLab server are kept alive across the notebooks
+    jupyterlab_helper: JupyterLabHelper = JupyterLabHelper(url, token)
+
+    # When profiling concurrently, the runs cannot clear each other's sessions,
+    # hence clear them all once up front
+    exclusive: bool = concurrency <= 1
+    if not exclusive:
+        jupyterlab_helper.clear_all_jupyterlab_sessions()
+
+    # Pool of the web drivers reused across the profiling runs, so that a browser
+    # is launched once per concurrent run rather than once per notebook
+    web_drivers: SimpleQueue[Chrome] = SimpleQueue()
+
+    # Profile each notebook as soon as it is generated from the template,
+    # up to `concurrency` notebooks at a time, the progress bar being advanced as
+    # each profiling run completes, while the notebooks are still being generated
+    with (
+        jupyterlab_helper,
+        _quit_web_drivers_on_exit(web_drivers),
+        logging_redirect_tqdm([logger]),
+        tqdm(
+            total=count_notebooks(input_dir_path), **progress_bar_kwargs
+        ) as progress_bar,
+        ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor,
+    ):
+        # Launch the browsers up front, concurrently, while the first notebooks
+        # are being generated
+        for _ in range(max(concurrency, 1)):
+            executor.submit(_launch_web_driver, headless, web_drivers)
+        futures: list[Future] = []
+        try:
+            for nb_input_path in generate_notebooks(
+                input_dir_path=input_dir_path,
+                kernel_name=kernel_name,
+                gen_workers=gen_workers,
+            ):
+                future: Future[None] = executor.submit(
+                    _profile_notebook,
+                    replace(profiler_context, nb_input_path=nb_input_path),
+                    exclusive,
+                    web_drivers,
+                    jupyterlab_helper,
+                )
+                future.add_done_callback(lambda _: progress_bar.update())
+                futures.append(future)
+            # Consume the results to re-raise the first error, if any
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            # Do not start profiling the notebooks still waiting in the queue
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def _profile_notebook(
+    context: ProfilerContext,
+    exclusive: bool,
+    web_drivers: SimpleQueue[Chrome],
+    jupyterlab_helper: JupyterLabHelper,
+) -> None:
+    """
+    Profile a single notebook, as a task submitted to the profiling executor.
+    Parameters
+    ----------
+    context : ProfilerContext
+        The context containing all necessary parameters for profiling.
+    exclusive : bool
+        Whether the profiling run has the JupyterLab instance to itself.
+    web_drivers : SimpleQueue[Chrome]
+        The pool of web drivers to take a driver from, a new one is launched if
+        the pool is empty; the driver is put back in the pool after profiling.
+    jupyterlab_helper : JupyterLabHelper
+        The JupyterLab helper shared by the profiling runs.
+    """
+    logger.info("Profiling notebook: %s", context.nb_input_path)
+    try:
+        driver: Chrome = web_drivers.get_nowait()
+    except Empty:
+        driver = Profiler.create_web_driver(context.headless)
+    try:
+        profile_notebook(
+            context,
+            exclusive=exclusive,
+            driver=driver,
+            jupyterlab_helper=jupyterlab_helper,
+        )
+    except BaseException:
+        # Do not reuse a driver left in an unknown state
+        driver.quit()
+        raise
+    web_drivers.put(driver)
+
+
+def _launch_web_driver(headless: bool, web_drivers: SimpleQueue[Chrome]) -> None:
+    """
+    Launch a web driver and add it to the pool, as a task submitted to the profiling
+    executor ahead of the profiling tasks.
+    Parameters
+    ----------
+    headless : bool
+        Whether to run the browser in headless mode.
+    web_drivers : SimpleQueue[Chrome]
+        The pool of web drivers to add the driver to.
+    """
+    try:
+        web_drivers.put(Profiler.create_web_driver(headless))
+    except Exception as e:
+        # The profiling tasks launch their own driver if the pool is empty
+        logger.warning("Could not launch a web driver up front: %s", e)
+
+
+@contextmanager
+def _quit_web_drivers_on_exit(web_drivers: SimpleQueue[Chrome]) -> Iterator[None]:
+    """
+    Context manager quitting all the web drivers left in the pool on exit.
+    Parameters
+    ----------
+    web_drivers : SimpleQueue[Chrome]
+        The pool of web drivers.
+    """
+    try:
+        yield
+    finally:
+        while not web_drivers.empty():
+            web_drivers.get_nowait().quit()
+        logger.debug("Web drivers closed.")
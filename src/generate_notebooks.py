@@ -1,9 +1,26 @@
 import logging
+from collections.abc import Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
+from functools import lru_cache
+from multiprocessing import get_context
 from pathlib import Path
 from typing import Any
 
 from src.notebook_generator import NotebookGenerator
-from src.utils import dict_combinations, get_logger, load_dict_from_json_file
+from src.utils import (
+    count_dict_combinations,
+    dict_combinations,
+    get_logger,
+    load_dict_from_json_file,
+)
 
 # Initialize logger
 logger: logging.Logger = get_logger()
@@ -11,89 +28,326 @@ logger: logging.Logger = get_logger()
 NOTEBOOK_TEMPLATE_FILENAME: str = "template.ipynb"
 PARAMS_FILENAME: str = "params.json"
 OUTPUT_DIR_PATH: str = "notebooks"
+# Suffix of the sidecar files recording the key of each generated notebook
+NOTEBOOK_KEY_SUFFIX: str = ".ipynb.key"
 
 
-def generate_notebooks(input_dir_path: Path, kernel_name: str) -> list[Path]:
+def generate_notebooks(
+    input_dir_path: Path, kernel_name: str, gen_workers: int = 1
+) -> Iterator[Path]:
     """
     Generate the parameterized notebooks from a template.ipynb and params.json, and
     save them to the "notebooks" directory.
+    The notebooks are generated lazily, each path is yielded as soon as the
+    notebook has been written, so that consumers can start using it right away.
+    With several worker processes, the paths are yielded in completion order.
     Parameters
     ----------
     input_dir_path : Path
         Path to the directory containing the template.ipynb and params.json files.
     kernel_name : str
         The name of the kernel to use for the generated notebooks.
-    Returns
-    -------
-    list[Path]
-        A list of paths to the generated notebooks.
+    gen_workers : int, optional
+        Number of worker processes generating the notebooks (default: 1). If 1, the
+        notebooks are generated in the current process.
+    Yields
+    ------
+    Path
+        The path to each generated notebook.
     Raises
     ------
     FileNotFoundError
         If the template.ipynb does not exist or the params.json file does not exist.
     """
     logger.debug(
-        f"Starting notebook generation with Input Directory Path: {input_dir_path}"
+        "Starting notebook generation with Input Directory Path: %s", input_dir_path
     )
 
     # Resolve the template.ipynb file path, params file path, and output directory path
     template_path: Path = input_dir_path / NOTEBOOK_TEMPLATE_FILENAME
-    params_path: Path = input_dir_path / PARAMS_FILENAME
     output_dir_path: Path = input_dir_path / OUTPUT_DIR_PATH
 
-    # Check if the template.ipynb file exists
-    if not template_path.exists():
+    # Get the template.ipynb file modification time, once for all the notebooks,
+    # which also checks that the file exists
+    try:
+        template_mtime_ns: int = template_path.stat().st_mtime_ns
+    except FileNotFoundError as e:
         raise FileNotFoundError(
             f"{NOTEBOOK_TEMPLATE_FILENAME} file does not exist in {input_dir_path}"
-        )
+        ) from e
 
-    # Check if the params file exists
-    if not params_path.exists():
-        raise FileNotFoundError(
-            f"{PARAMS_FILENAME} file does not exist in {input_dir_path}"
-        )
+    # Load parameters, which also checks that the params file exists
+    params: dict[str, Any] = load_params(input_dir_path)
 
     # Ensure the output directory exists
     output_dir_path.mkdir(parents=True, exist_ok=True)
 
-    # Load parameters
-    params: dict[str, Any] = load_dict_from_json_file(params_path)
-
-    # Generate all combinations of parameters
-    parameters_combinations: list[dict[str, Any]] = dict_combinations(params)
+    # Lazily generate all combinations of parameters
+    parameters_combinations: Iterator[dict[str, Any]] = dict_combinations(params)
+    total_combinations: int = count_dict_combinations(params)
 
     # Iterate over each combination of parameters and generate the notebooks
-    logger.info("Generating profiler notebooks...")
+    logger.info("Generating %s profiler notebooks...", total_combinations)
+
+    nb_base_path: Path = output_dir_path / input_dir_path.stem
+    total_notebooks: int = 0
+    if gen_workers <= 1:
+        # Generate the notebooks in the current process, while a writer thread saves
+        # the previous notebook to disk
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending_save: Future[Path] | None = None
+            for parameters_values in parameters_combinations:
+                notebook: RenderedNotebook = render_notebook(
+                    template_path,
+                    kernel_name,
+                    parameters_values,
+                    nb_base_path,
+                    template_mtime_ns,
+                )
+                if pending_save is not None:
+                    total_notebooks += 1
+                    # Hand over the output path to the consumer once saved
+                    yield pending_save.result()
+                pending_save = writer.submit(notebook.save)
+            if pending_save is not None:
+                total_notebooks += 1
+                yield pending_save.result()
+    else:
+        # Generate the notebooks in a pool of worker processes (spawned, since
+        # the caller may be running threads that must not be forked)
+        with ProcessPoolExecutor(
+            max_workers=gen_workers, mp_context=get_context("spawn")
+        ) as executor:
+            # Keep up to two notebooks per worker in generation, the next ones
+            # being submitted as the previous ones complete, so that the
+            # combinations are not all materialized up front
+            max_pending: int = 2 * gen_workers
+            pending: set[Future[Path]] = set()
+            try:
+                for parameters_values in parameters_combinations:
+                    if len(pending) >= max_pending:
+                        # Hand over each output path to the consumer as soon as its
+                        # notebook is generated, regardless of the combinations order
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            total_notebooks += 1
+                            yield future.result()
+                    pending.add(
+                        executor.submit(
+                            generate_notebook,
+                            template_path,
+                            kernel_name,
+                            parameters_values,
+                            nb_base_path,
+                            template_mtime_ns,
+                        )
+                    )
+                for future in as_completed(pending):
+                    total_notebooks += 1
+                    yield future.result()
+            except BaseException:
+                # Do not generate the remaining notebooks if the consumer stopped
+                # or a generation failed
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
 
-    # Initialize the NotebookGenerator
-    notebook_generator = NotebookGenerator(
-        template_path=template_path, kernel_name=kernel_name
+    logger.info(
+        "Notebooks generation completed. Total notebooks generated: %s.",
+        total_notebooks,
     )
-    nb_base_filename: str = input_dir_path.stem
-    output_paths: list[Path] = []
-    for parameters_values in parameters_combinations:
-        # Create the output path for the generated notebook
-        nb_filename: str = nb_base_filename
-        for k, v in parameters_values.items():
-            nb_filename = f"{nb_filename}-{k.removesuffix('_value')}{v}"
-        nb_filename = f"{nb_filename}.ipynb"
-        output_path: Path = output_dir_path / nb_filename
-
-        # Remove the output path if exists
-        output_path.unlink(missing_ok=True)
-
-        # Generate the notebook
-        notebook_generator.generate_and_save(
-            parameters_values=parameters_values,
-            output_path=output_path,
+
+
+def load_params(input_dir_path: Path) -> dict[str, Any]:
+    """
+    Load the parameters of the notebooks to generate from the params.json file.
+    Parameters
+    ----------
+    input_dir_path : Path
+        Path to the directory containing the params.json file.
+    Returns
+    -------
+    dict[str, Any]
+        The parameter names and their possible values.
+    Raises
+    ------
+    FileNotFoundError
+        If the params.json file does not exist.
+    """
+    try:
+        return load_dict_from_json_file(input_dir_path / PARAMS_FILENAME)
+    except FileNotFoundError as e:
+        raise FileNotFoundError(
+            f"{PARAMS_FILENAME} file does not exist in {input_dir_path}"
+        ) from e
+
+
+def count_notebooks(input_dir_path: Path) -> int:
+    """
+    Count the parameterized notebooks generated by `generate_notebooks`, without
+    generating them.
+    Parameters
+    ----------
+    input_dir_path : Path
+        Path to the directory containing the params.json file.
+    Returns
+    -------
+    int
+        The number of notebooks.
+    Raises
+    ------
+    FileNotFoundError
+        If the params.json file does not exist.
+    """
+    return count_dict_combinations(load_params(input_dir_path))
+
+
+@dataclass(frozen=True, eq=False)
+class RenderedNotebook:
+    """
+    A parameterized notebook generated from a template.ipynb, to be saved.
+    Attributes
+    ----------
+    output_path : Path
+        Path to the output notebook file.
+    key_path : Path
+        Path to the sidecar file recording the key of the notebook.
+    key : str
+        The key identifying the content of the notebook.
+    content : bytes | None
+        The serialized notebook, None if the saved notebook is up to date.
+    """
+
+    output_path: Path
+    key_path: Path
+    key: str
+    content: bytes | None = field(default=None, repr=False)
+
+    def save(self) -> Path:
+        """
+        Save the notebook, overwriting any existing one, and record its key, unless
+        the saved notebook is up to date.
+        Returns
+        -------
+        Path
+            The path to the saved notebook.
+        """
+        if self.content is not None:
+            self.output_path.write_bytes(self.content)
+            self.key_path.write_text(self.key)
+        return self.output_path
+
+
+def generate_notebook(
+    template_path: Path,
+    kernel_name: str,
+    parameters_values: dict[str, Any],
+    nb_base_path: Path,
+    template_mtime_ns: int | None = None,
+) -> Path:
+    """
+    Generate and save a single parameterized notebook, see `render_notebook`.
+    This is a module level function so that it can be run in worker processes.
+    Parameters
+    ----------
+    template_path : Path
+        Path to the template notebook file.
+    kernel_name : str
+        The name of the kernel to use for the generated notebook.
+    parameters_values : dict[str, Any]
+        Dictionary containing parameter names and their values.
+    nb_base_path : Path
+        Base path of the output notebook file, without the parameters and extension.
+    template_mtime_ns : int | None, optional
+        The modification time of the template notebook file, if already known
+        (default: None, the template notebook file is stat'ed).
+    Returns
+    -------
+    Path
+        The path to the generated notebook.
+    """
+    return render_notebook(
+        template_path, kernel_name, parameters_values, nb_base_path, template_mtime_ns
+    ).save()
+
+
+def render_notebook(
+    template_path: Path,
+    kernel_name: str,
+    parameters_values: dict[str, Any],
+    nb_base_path: Path,
+    template_mtime_ns: int | None = None,
+) -> RenderedNotebook:
+    """
+    Generate a single parameterized notebook from a template.ipynb, named after the
+    parameters values, e.g. <nb_base_path>-<param1><value1>-<param2><value2>.ipynb.
+    The generation is skipped if the notebook is up to date, i.e. its sidecar key
+    file matches the template, the kernel name and the parameters values.
+    Parameters
+    ----------
+    template_path : Path
+        Path to the template notebook file.
+    kernel_name : str
+        The name of the kernel to use for the generated notebook.
+    parameters_values : dict[str, Any]
+        Dictionary containing parameter names and their values.
+    nb_base_path : Path
+        Base path of the output notebook file, without the parameters and extension.
+    template_mtime_ns : int | None, optional
+        The modification time of the template notebook file, if already known
+        (default: None, the template notebook file is stat'ed).
+    Returns
+    -------
+    RenderedNotebook
+        The generated notebook, to be saved.
+    """
+    # Create the output path for the generated notebook
+    nb_filename: str = nb_base_path.name + "".join(
+        f"{prefix}{value}"
+        for prefix, value in zip(
+            _get_filename_prefixes(tuple(parameters_values)),
+            parameters_values.values(),
         )
+    )
+    output_path: Path = nb_base_path.with_name(f"{nb_filename}.ipynb")
+    key_path: Path = nb_base_path.with_name(f"{nb_filename}{NOTEBOOK_KEY_SUFFIX}")
+
+    notebook_generator: NotebookGenerator = NotebookGenerator(
+        template_path=template_path,
+        kernel_name=kernel_name,
+        template_mtime_ns=template_mtime_ns,
+    )
 
-        # Append the output path to the list
-        output_paths.append(output_path)
+    # Skip the generation if the notebook was already generated from the same
+    # template, kernel and parameters values
+    nb_key: str = notebook_generator.get_notebook_key(parameters_values)
+    try:
+        if key_path.read_text() == nb_key and output_path.exists():
+            logger.debug("Notebook %s is up to date, skipping generation", output_path)
+            return RenderedNotebook(output_path, key_path, nb_key)
+    except FileNotFoundError:
+        pass
 
-    logger.info(
-        "Notebooks generation completed. "
-        f"Total notebooks generated: {len(output_paths)}."
+    # Generate the notebook, the parsed template is cached across calls
+    return RenderedNotebook(
+        output_path,
+        key_path,
+        nb_key,
+        notebook_generator.generate(parameters_values),
     )
 
-    return output_paths
+
+@lru_cache(maxsize=8)
+def _get_filename_prefixes(parameters_names: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Get the prefixes of the parameters values in the generated notebooks filenames,
+    e.g. "-<param1>" for the parameter "<param1>_value".
+    Parameters
+    ----------
+    parameters_names : tuple[str, ...]
+        The names of the parameters.
+    Returns
+    -------
+    tuple[str, ...]
+        The filename prefix of each parameter value.
+    """
+    return tuple(f"-{name.removesuffix('_value')}" for name in parameters_names)
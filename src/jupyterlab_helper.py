@@ -1,11 +1,17 @@
-import json
 import logging
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
 from dataclasses import dataclass
-from functools import cache, cached_property
+from functools import cached_property
+from hashlib import blake2b
+from http import HTTPStatus
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar, Self
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 from src.utils import get_logger
@@ -21,6 +27,21 @@ class JupyterLabHelper:
     url: str
     token: str
 
+    # Max number of requests sent concurrently to the JupyterLab server
+    MAX_CONCURRENT_REQUESTS: ClassVar[int] = 8
+
+    # Max seconds to wait for the JupyterLab server to answer a request
+    REQUEST_TIMEOUT: ClassVar[float] = 30
+
+    # JSON payload of the notebook upload requests, around the notebook content
+    UPLOAD_PAYLOAD_PREFIX: ClassVar[bytes] = (
+        b'{"type": "notebook", "format": "json", "content": '
+    )
+    UPLOAD_PAYLOAD_SUFFIX: ClassVar[bytes] = b"}"
+
+    # Regex matching the start of a JSON object, as the notebook content must be
+    UPLOAD_CONTENT_START_REGEX: ClassVar[re.Pattern[bytes]] = re.compile(rb"\s*\{")
+
     @cached_property
     def headers(self) -> dict[str, str]:
         """
@@ -35,6 +56,39 @@ class JupyterLabHelper:
             "Content-Type": "application/json",
         }
 
+    @cached_property
+    def session(self) -> requests.Session:
+        """
+        Get the HTTP session used for all the JupyterLab API requests, keeping the
+        connections to the JupyterLab server alive across requests.
+        Returns
+        -------
+        requests.Session
+            The HTTP session, with the headers required for the API requests.
+        """
+        session: requests.Session = requests.Session()
+        session.headers.update(self.headers)
+        # Keep up to a connection per concurrent request alive
+        adapter: HTTPAdapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.MAX_CONCURRENT_REQUESTS
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self) -> None:
+        """
+        Close the HTTP session and its connections to the JupyterLab server.
+        """
+        if "session" in self.__dict__:
+            self.session.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
     @staticmethod
     def get_notebook_filename(notebook_path: Path) -> str:
         """
@@ -50,7 +104,6 @@ class JupyterLabHelper:
         """
         return notebook_path.name
 
-    @cache
     def get_notebook_url(self, notebook_path: Path) -> str:
         """
         Get the full URL to access a notebook in JupyterLab.
@@ -63,15 +116,42 @@ class JupyterLabHelper:
         str
             Full URL to access the notebook.
         """
-        return (
-            f"{self.url}/lab/tree/"
-            f"{self.get_notebook_filename(notebook_path)}/?token={self.token}"
-        )
+        notebook_filename: str = self.get_notebook_filename(notebook_path)
+        return f"{self.url}/lab/tree/{notebook_filename}/?token={self.token}"
 
-    def clear_all_jupyterlab_sessions(self) -> None:
+    @cached_property
+    def sessions_url(self) -> str:
+        """
+        Get the URL of the JupyterLab sessions API.
+        Returns
+        -------
+        str
+            URL of the sessions API.
+        """
+        return f"{self.url}/api/sessions"
+
+    @cached_property
+    def kernels_url(self) -> str:
+        """
+        Get the URL of the JupyterLab kernels API.
+        Returns
+        -------
+        str
+            URL of the kernels API.
+        """
+        return f"{self.url}/api/kernels"
+
+    def clear_all_jupyterlab_sessions(
+        self, notebook_filename: str | None = None
+    ) -> None:
         """
         Clear all active sessions (notebooks, consoles, terminals) in the
         JupyterLab instance.
+        Parameters
+        ----------
+        notebook_filename : str | None, optional
+            If given, only the sessions opened on this notebook are cleared
+            (default: None, all sessions are cleared).
         Raises
         ------
         RequestException
@@ -79,43 +159,83 @@ class JupyterLabHelper:
         Exception
             For any other unexpected errors.
         """
+        first_error: BaseException | None = None
         try:
             # Get a list of all running sessions
-            response: requests.Response = requests.get(
-                f"{self.url}/api/sessions", headers=self.headers
+            response: requests.Response = self.session.get(
+                self.sessions_url, timeout=self.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            sessions: list[dict[str, Any]] = response.json()
+            sessions: list[dict[str, Any]] = [
+                session
+                for session in orjson.loads(response.content)
+                if notebook_filename is None or session.get("path") == notebook_filename
+            ]
             if not sessions:
                 logger.info("No active sessions found.")
                 return
-            logger.info(f"Found {len(sessions)} active sessions. Shutting them down...")
-            # Shut down each session
-            for session in sessions:
-                session_id: str = session["id"]
-                shutdown_response: requests.Response = requests.delete(
-                    f"{self.url}/api/sessions/{session_id}", headers=self.headers
-                )
-                shutdown_response.raise_for_status()
-                # Print a status message based on the session type
-                if session.get("kernel"):
-                    logger.info(
-                        "Shut down notebook/console session: "
-                        f"{session['path']} (ID: {session_id})"
-                    )
-                elif "terminal" in session:
-                    logger.info(
-                        f"Shut down terminal session: {session['name']} "
-                        f"(ID: {session_id})"
+            logger.info(
+                "Found %s active sessions. Shutting them down...", len(sessions)
+            )
+            # Shut down the sessions concurrently, each DELETE is independent
+            with ThreadPoolExecutor(
+                max_workers=min(len(sessions), self.MAX_CONCURRENT_REQUESTS)
+            ) as executor:
+                shutdowns: list[Future[None]] = [
+                    executor.submit(self.shutdown_session, session)
+                    for session in sessions
+                ]
+            # Log every failed shutdown, once all of them have been attempted
+            for session, shutdown in zip(sessions, shutdowns, strict=True):
+                if (error := shutdown.exception()) is not None:
+                    logger.error(
+                        "Could not shut down session (ID: %s): %s", session["id"], error
                     )
-                else:
-                    logger.info(f"Shut down unknown session type (ID: {session_id})")
+                    first_error = first_error or error
         except RequestException as e:
-            logger.exception(f"Error communicating with JupyterLab server: {e}")
+            logger.exception("Error communicating with JupyterLab server: %s", e)
             raise e
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
             raise e
+        # Re-raise the first failed shutdown, if any, already logged
+        if first_error is not None:
+            raise first_error
+
+    def shutdown_session(self, session: dict[str, Any]) -> None:
+        """
+        Shut down an active session in the JupyterLab instance.
+        Parameters
+        ----------
+        session : dict[str, Any]
+            The session, as returned by the JupyterLab sessions API.
+        Raises
+        ------
+        RequestException
+            If there is an error communicating with the JupyterLab server.
+        """
+        session_id: str = session["id"]
+        shutdown_response: requests.Response = self.session.delete(
+            f"{self.sessions_url}/{session_id}", timeout=self.REQUEST_TIMEOUT
+        )
+        # A session not found has been shut down meanwhile, e.g. along with its kernel
+        if shutdown_response.status_code == HTTPStatus.NOT_FOUND:
+            logger.info("Session already shut down (ID: %s)", session_id)
+            return
+        shutdown_response.raise_for_status()
+        # Print a status message based on the session type
+        if session.get("kernel"):
+            logger.info(
+                "Shut down notebook/console session: %s (ID: %s)",
+                session["path"],
+                session_id,
+            )
+        elif "terminal" in session:
+            logger.info(
+                "Shut down terminal session: %s (ID: %s)", session["name"], session_id
+            )
+        else:
+            logger.info("Shut down unknown session type (ID: %s)", session_id)
 
     def get_kernel_id_from_name(self, kernel_name: str) -> str | None:
         """
@@ -137,23 +257,87 @@ class JupyterLabHelper:
         """
         try:
             # Get the list of all kernels
-            response: requests.Response = requests.get(
-                f"{self.url}/api/kernels", headers=self.headers
+            response: requests.Response = self.session.get(
+                self.kernels_url, timeout=self.REQUEST_TIMEOUT
             )
             response.raise_for_status()
             # Find the kernel ID for the given kernel name
-            for kernel in response.json():
+            for kernel in orjson.loads(response.content):
                 if kernel["name"] == kernel_name:
                     return kernel["id"]
-            logger.warning(f"No active kernel found for kernel name: {kernel_name}.")
+            logger.warning("No active kernel found for kernel name: %s.", kernel_name)
             return None
         except RequestException as e:
-            logger.exception(f"Error communicating with JupyterLab server: {e}")
+            logger.exception("Error communicating with JupyterLab server: %s", e)
             raise e
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
             raise e
 
+    def get_kernel_from_notebook(self, notebook_filename: str) -> dict[str, Any] | None:
+        """
+        Get the kernel attached to the session opened on a given notebook.
+        Parameters
+        ----------
+        notebook_filename : str
+            Name of the notebook file the session has been opened on.
+        Returns
+        -------
+        dict[str, Any] | None
+            The kernel, as returned by the JupyterLab sessions API (with its ID and
+            execution state), if found, else None.
+        Raises
+        ------
+        RequestException
+            If there is an error communicating with the JupyterLab server.
+        Exception
+            For any other unexpected errors.
+        """
+        try:
+            # Get the list of all running sessions
+            response: requests.Response = self.session.get(
+                self.sessions_url, timeout=self.REQUEST_TIMEOUT
+            )
+            response.raise_for_status()
+            # Find the kernel of the session opened on the given notebook
+            for session in orjson.loads(response.content):
+                if session.get("path") == notebook_filename and session.get("kernel"):
+                    return session["kernel"]
+            return None
+        except RequestException as e:
+            logger.exception("Error communicating with JupyterLab server: %s", e)
+            raise e
+        except Exception as e:
+            logger.exception("An unexpected error occurred: %s", e)
+            raise e
+
+    def get_kernel_id_from_notebook(self, notebook_filename: str) -> str | None:
+        """
+        Get the ID of the kernel attached to the session opened on a given notebook.
+        Parameters
+        ----------
+        notebook_filename : str
+            Name of the notebook file the session has been opened on.
+        Returns
+        -------
+        str | None
+            The kernel ID if found, else None.
+        Raises
+        ------
+        RequestException
+            If there is an error communicating with the JupyterLab server.
+        Exception
+            For any other unexpected errors.
+        """
+        # Find the kernel of the session opened on the given notebook
+        kernel: dict[str, Any] | None = self.get_kernel_from_notebook(notebook_filename)
+        if kernel is None:
+            logger.warning(
+                "No active session found for notebook: %s.", notebook_filename
+            )
+            return None
+        return kernel["id"]
+
     def restart_kernel(self, kernel_name: str) -> None:
         """
         Restart the kernel for a given kernel name.
@@ -165,35 +349,59 @@ class JupyterLabHelper:
             For any other unexpected errors.
         """
         # Get the kernel ID from the kernel name
-        kernel_id = self.get_kernel_id_from_name(kernel_name)
+        kernel_id: str | None = self.get_kernel_id_from_name(kernel_name)
         if not kernel_id:
-            logger.warning(f"No active kernel found for kernel name: {kernel_name}.")
+            logger.warning("No active kernel found for kernel name: %s.", kernel_name)
             return
         try:
             # Restart the kernel
-            restart_response: requests.Response = requests.post(
-                f"{self.url}/api/kernels/{kernel_id}/restart", headers=self.headers
+            restart_response: requests.Response = self.session.post(
+                f"{self.kernels_url}/{kernel_id}/restart", timeout=self.REQUEST_TIMEOUT
             )
+            if restart_response.status_code == HTTPStatus.NOT_FOUND:
+                # The kernel is gone meanwhile: look the kernel up again, once
+                kernel_id = self.get_kernel_id_from_name(kernel_name)
+                if not kernel_id:
+                    logger.warning(
+                        "No active kernel found for kernel name: %s.", kernel_name
+                    )
+                    return
+                restart_response = self.session.post(
+                    f"{self.kernels_url}/{kernel_id}/restart",
+                    timeout=self.REQUEST_TIMEOUT,
+                )
             restart_response.raise_for_status()
-            logger.info(f"Kernel {kernel_id} restarted successfully.")
+            logger.info("Kernel %s restarted successfully.", kernel_id)
         except RequestException as e:
-            logger.exception(f"Error communicating with JupyterLab server: {e}")
+            logger.exception("Error communicating with JupyterLab server: %s", e)
             raise e
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
             raise e
 
-    def upload_notebook(self, notebook_path: Path) -> None:
+    def upload_notebook(
+        self, notebook_path: Path, content: bytes | None = None
+    ) -> dict[str, Any]:
         """
         Upload the notebook from the given path to the JupyterLab instance.
         Parameters
         ----------
         notebook_path : Path
             Path to the notebook file to be uploaded.
+        content : bytes | None, optional
+            The raw JSON content of the notebook, if already read from the notebook
+            file (default: None, the notebook file is read).
+        Returns
+        -------
+        dict[str, Any]
+            The model of the uploaded notebook, without its content, as returned by
+            the JupyterLab contents API.
         Raises
         ------
         FileNotFoundError
             If the notebook file does not exist.
+        ValueError
+            If the notebook content is not a JSON object.
         RequestException
             If there is an error communicating with the JupyterLab server.
         Exception
@@ -203,26 +411,146 @@ class JupyterLabHelper:
             # Extract filename from path
             notebook_filename: str = self.get_notebook_filename(notebook_path)
             upload_url: str = f"{self.url}/api/contents/{notebook_filename}"
-            logger.info(f"Uploading notebook to {upload_url}")
-            with notebook_path.open("r", encoding="utf-8") as nb_file:
-                payload: dict[str, Any] = {
-                    "content": json.load(nb_file),
-                    "type": "notebook",
-                    "format": "json",
-                }
-            response: requests.Response = requests.put(
-                upload_url, headers=self.headers, json=payload
+            logger.info("Uploading notebook to %s", upload_url)
+            if content is None:
+                content = notebook_path.read_bytes()
+            # The content is embedded as is, check that it is at least a JSON object
+            if not self.UPLOAD_CONTENT_START_REGEX.match(content):
+                raise ValueError(f"The notebook {notebook_path} is not a JSON object.")
+            # The notebook is already JSON: embed it as is in the request payload
+            # rather than parsing it and serializing it again
+            payload: bytes = b"".join(
+                (self.UPLOAD_PAYLOAD_PREFIX, content, self.UPLOAD_PAYLOAD_SUFFIX)
+            )
+            response: requests.Response = self.session.put(
+                upload_url, data=payload, timeout=self.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            logger.info(f"Notebook uploaded successfully to {upload_url}")
+            logger.info("Notebook uploaded successfully to %s", upload_url)
+            return orjson.loads(response.content)
         except FileNotFoundError as e:
-            logger.exception(f"Notebook file not found: {notebook_path}")
+            logger.exception("Notebook file not found: %s", notebook_path)
+            raise e
+        except RequestException as e:
+            logger.exception("Error uploading notebook: %s", e)
             raise e
+        except Exception as e:
+            logger.exception("An unexpected error occurred: %s", e)
+            raise e
+
+    @staticmethod
+    def get_upload_record_path(notebook_path: Path) -> Path:
+        """
+        Get the path of the file recording the last upload of a notebook, next to
+        the notebook file.
+        Parameters
+        ----------
+        notebook_path : Path
+            Path to the notebook file.
+        Returns
+        -------
+        Path
+            Path to the upload record file.
+        """
+        return notebook_path.with_name(f".{notebook_path.name}.upload.json")
+
+    def upload_notebook_if_changed(
+        self, notebook_path: Path, content: bytes | None = None
+    ) -> None:
+        """
+        Upload the notebook from the given path to the JupyterLab instance, unless
+        the notebook uploaded by a previous run is still there and unchanged, both
+        locally and in the JupyterLab instance. The upload is recorded next to the
+        notebook file.
+        Parameters
+        ----------
+        notebook_path : Path
+            Path to the notebook file to be uploaded.
+        content : bytes | None, optional
+            The raw JSON content of the notebook, if already read from the notebook
+            file (default: None, the notebook file is read).
+        Raises
+        ------
+        FileNotFoundError
+            If the notebook file does not exist.
+        ValueError
+            If the notebook content is not a JSON object.
+        RequestException
+            If there is an error communicating with the JupyterLab server.
+        Exception
+            For any other unexpected errors.
+        """
+        if content is None:
+            content = notebook_path.read_bytes()
+        notebook_filename: str = self.get_notebook_filename(notebook_path)
+        record_path: Path = self.get_upload_record_path(notebook_path)
+        record: dict[str, Any] = {
+            "url": self.url,
+            "digest": blake2b(content, digest_size=16).hexdigest(),
+        }
+
+        # Skip the upload if the notebook has not changed since the last upload,
+        # and has not been modified nor deleted in the JupyterLab instance since
+        last_record: dict[str, Any] = {}
+        with suppress(FileNotFoundError, orjson.JSONDecodeError):
+            last_record = orjson.loads(record_path.read_bytes())
+        if (
+            last_record.get("url") == record["url"]
+            and last_record.get("digest") == record["digest"]
+        ):
+            last_modified: str | None = self.get_notebook_last_modified(
+                notebook_filename
+            )
+            if last_modified is not None and last_modified == last_record.get(
+                "last_modified"
+            ):
+                logger.info(
+                    "Notebook %s unchanged since its last upload, skipping upload.",
+                    notebook_filename,
+                )
+                return
+
+        model: dict[str, Any] = self.upload_notebook(notebook_path, content)
+
+        # Record the upload, with the modification time of the uploaded notebook
+        record["last_modified"] = model.get("last_modified")
+        record_path.write_bytes(orjson.dumps(record))
+
+    def get_notebook_last_modified(self, notebook_filename: str) -> str | None:
+        """
+        Get the last modification time of a notebook in the JupyterLab instance,
+        without its content.
+        Parameters
+        ----------
+        notebook_filename : str
+            Name of the notebook file.
+        Returns
+        -------
+        str | None
+            The last modification time of the notebook, or None if the notebook
+            does not exist.
+        Raises
+        ------
+        RequestException
+            If there is an error communicating with the JupyterLab server.
+        Exception
+            For any other unexpected errors.
+        """
+        try:
+            response: requests.Response = self.session.get(
+                f"{self.url}/api/contents/{notebook_filename}",
+                params={"content": 0},
+                timeout=self.REQUEST_TIMEOUT,
+            )
+            if response.status_code == HTTPStatus.NOT_FOUND:
+                return None
+            response.raise_for_status()
+            return orjson.loads(response.content).get("last_modified")
         except RequestException as e:
-            logger.exception(f"Error uploading notebook: {e}")
+            logger.exception("Error communicating with JupyterLab server: %s", e)
             raise e
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
             raise e
 
     def delete_notebook(self, notebook_filename: str) -> None:
@@ -241,17 +569,17 @@ class JupyterLabHelper:
         """
         try:
             delete_url: str = f"{self.url}/api/contents/{notebook_filename}"
-            logger.info(f"Deleting notebook at {delete_url}")
-            response: requests.Response = requests.delete(
-                delete_url, headers=self.headers
+            logger.info("Deleting notebook at %s", delete_url)
+            response: requests.Response = self.session.delete(
+                delete_url, timeout=self.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            logger.info(f"Notebook deleted successfully from {delete_url}")
+            logger.info("Notebook deleted successfully from %s", delete_url)
         except RequestException as e:
-            logger.exception(f"Error deleting notebook: {e}")
+            logger.exception("Error deleting notebook: %s", e)
             raise e
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
             raise e
 
     def get_kernel_usage(self, kernel_id: str) -> dict[str, Any]:
@@ -274,17 +602,50 @@ class JupyterLabHelper:
         """
         try:
             # Get the usage info for a specific kernel
-            response: requests.Response = requests.get(
+            response: requests.Response = self.session.get(
                 f"{self.url}/api/metrics/v1/kernel_usage/get_usage/{kernel_id}",
-                headers=self.headers,
+                timeout=self.REQUEST_TIMEOUT,
+            )
+            response.raise_for_status()
+            return orjson.loads(response.content).get("content", {})
+        except RequestException as e:
+            logger.exception("Error communicating with JupyterLab server: %s", e)
+            raise e
+        except Exception as e:
+            logger.exception("An unexpected error occurred: %s", e)
+            raise e
+
+    def get_kernel_execution_state(self, kernel_id: str) -> str | None:
+        """
+        Get the execution state of a specific kernel, as last reported by the kernel
+        to the JupyterLab server (e.g. "busy" or "idle").
+        Parameters
+        ----------
+        kernel_id : str
+            The ID of the kernel.
+        Returns
+        -------
+        str | None
+            The execution state of the kernel, or None if not found.
+        Raises
+        ------
+        RequestException
+            If there is an error communicating with the JupyterLab server.
+        Exception
+            For any other unexpected errors.
+        """
+        try:
+            # Get the model of the kernel
+            response: requests.Response = self.session.get(
+                f"{self.kernels_url}/{kernel_id}", timeout=self.REQUEST_TIMEOUT
             )
             response.raise_for_status()
-            return response.json().get("content", {})
+            return orjson.loads(response.content).get("execution_state")
         except RequestException as e:
-            logger.exception(f"Error communicating with JupyterLab server: {e}")
+            logger.exception("Error communicating with JupyterLab server: %s", e)
             raise e
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
             raise e
 
     def get_current_kernel_pid(self, kernel_id: str) -> int | None:
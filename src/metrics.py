@@ -1,9 +1,9 @@
 import csv
-from collections import OrderedDict
 from collections.abc import Callable
 from dataclasses import asdict, field, make_dataclass
 from pathlib import Path
 from statistics import mean
+from threading import Lock
 from typing import Any, ClassVar
 
 from src.utils import CellExecutionStatus
@@ -50,23 +50,24 @@ class Metrics(BaseMetrics):
         f"{source}_{metric}_list" for source, metric in SOURCE_METRIC_COMBO
     )
 
+    # Lock to serialize the writes to the CSV files from concurrent profiling runs
+    CSV_WRITE_LOCK: ClassVar[Lock] = Lock()
+
     @staticmethod
-    def dict_factory(data: list[tuple[str, Any]]) -> OrderedDict[str, Any]:
+    def dict_factory(data: list[tuple[str, Any]]) -> dict[str, Any]:
         """
         Custom dict factory to round float values to 2 decimal places and
         exclude certain keys.
         Parameters:
             data (list[tuple[str, Any]]): List of key-value pairs.
         Returns:
-            OrderedDict[str, Any]: Processed ordered dictionary.
+            dict[str, Any]: Processed dictionary.
         """
-        return OrderedDict(
-            {
-                k: round(v, 2) if isinstance(v, float) else v
-                for (k, v) in data
-                if k not in Metrics.EXCLUDE_KEYS
-            }
-        )
+        return {
+            k: round(v, 2) if isinstance(v, float) else v
+            for (k, v) in data
+            if k not in Metrics.EXCLUDE_KEYS
+        }
 
     def save_metrics_to_csv(
         self,
@@ -91,22 +92,23 @@ class Metrics(BaseMetrics):
                 dict_factory=self.dict_factory,
             ).items()
         }
-        # Combine all into a single OrderedDict for CSV writing
-        data: list[OrderedDict[str, Any]] = [
-            OrderedDict(
+        # Combine all into a single dict for CSV writing
+        data: list[dict[str, Any]] = [
+            {
                 **first_col,
                 **self.get_extra_values(),
                 **_nb_params_dict,
                 **metrics_dict,
-            )
+            }
         ]
-        # Determine if we need to write the header
-        writeheader: bool = csv_file_path.stat().st_size <= 0
-        # Write metrics to CSV file
-        with csv_file_path.open("a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=list(data[0].keys()))
-            writeheader and writer.writeheader()
-            writer.writerows(data)
+        with self.CSV_WRITE_LOCK:
+            # Determine if we need to write the header
+            writeheader: bool = csv_file_path.stat().st_size <= 0
+            # Write metrics to CSV file
+            with csv_file_path.open("a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(data[0].keys()))
+                writeheader and writer.writeheader()
+                writer.writerows(data)
 
     def get_extra_values(self) -> dict[str, Any]:
         return {}
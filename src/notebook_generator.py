@@ -1,15 +1,18 @@
 import logging
+from copy import copy
 from dataclasses import dataclass
-from functools import cached_property
+from functools import cached_property, lru_cache
+from hashlib import blake2b
 from os import linesep
 from pathlib import Path
+from string import Formatter
 from typing import Any, ClassVar
 
-from nbformat import NO_CONVERT
-from nbformat import read as nb_read
-from nbformat import reads as nb_reads
-from nbformat import write as nb_write
-from nbformat import writes as nb_writes
+import orjson
+from nbformat import NotebookNode
+from nbformat import from_dict as nb_from_dict
+from nbformat import validate as nb_validate
+from nbformat.v4.rwbase import rejoin_lines, strip_transient
 
 from src.utils import get_logger
 
@@ -28,14 +31,33 @@ class NotebookGenerator:
         Path to the template notebook file.
     kernel_name : str
         The name of the kernel to use for the generated notebooks.
+    template_mtime_ns : int | None
+        The modification time of the template notebook file, if already known
+        (default: None, the template notebook file is stat'ed).
     """
 
     template_path: Path
     kernel_name: str
+    template_mtime_ns: int | None = None
 
     PARAMS_CELL_TAG: ClassVar[str] = "parameters"
     DONE_STATEMENT: ClassVar[str] = 'print("DONE")'
 
+    # Version of the notebooks generation, part of the keys of the generated
+    # notebooks: to bump whenever the generated notebooks change for the same
+    # template, e.g. with the done statement or the serialization options, so that
+    # the notebooks generated by a previous version are generated again
+    GENERATOR_VERSION: ClassVar[int] = 1
+
+    # Options to serialize the generated notebooks with, sorted keys as in nbformat.
+    # Unlike nbformat, which indents with 1 space and splits the cell sources into
+    # lists of lines, the notebooks are indented with 2 spaces and their cell
+    # sources are single strings: the notebooks are equivalent, but their files
+    # differ from the ones written by nbformat
+    ORJSON_OPTIONS: ClassVar[int] = (
+        orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+    )
+
     @staticmethod
     def add_statement_to_cell_source(statement: str, cell_source: str) -> str:
         """
@@ -57,71 +79,289 @@ class NotebookGenerator:
         return cell_source
 
     @cached_property
-    def preprocessed_nb_template_raw_content(self) -> str:
+    def current_template_mtime_ns(self) -> int:
         """
-        Preprocess the notebook template by retaining only code cells, clearing outputs,
-        resetting execution counts, and adding a done statement to each cell.
+        Get the modification time of the template notebook file, the one given if
+        any, otherwise from the file.
+        Returns
+        -------
+        int
+            The modification time of the template notebook file in nanoseconds.
+        """
+        if self.template_mtime_ns is not None:
+            return self.template_mtime_ns
+        return self.template_path.stat().st_mtime_ns
+
+    @cached_property
+    def preprocessed_nb_template(self) -> NotebookNode:
+        """
+        Get the preprocessed notebook template, see `preprocess_template`.
+        The template is parsed and preprocessed only once per template modification
+        time, and is shared across instances: it must not be modified.
+        Returns
+        -------
+        NotebookNode
+            The preprocessed notebook template.
+        """
+        return self.preprocess_template(
+            self.template_path, self.kernel_name, self.current_template_mtime_ns
+        )
+
+    @cached_property
+    def template_digest(self) -> bytes:
+        """
+        Get the digest of the template notebook file, see `hash_template`.
+        Returns
+        -------
+        bytes
+            The digest of the template notebook file.
+        """
+        return self.hash_template(self.template_path, self.current_template_mtime_ns)
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def hash_template(template_path: Path, template_mtime_ns: int) -> bytes:
+        """
+        Hash the content of the template notebook file.
+        Parameters
+        ----------
+        template_path : Path
+            Path to the template notebook file.
+        template_mtime_ns : int
+            The modification time of the template notebook file, only used as a
+            cache key so that the file is hashed again only when it changes.
+        Returns
+        -------
+        bytes
+            The digest of the template notebook file.
+        """
+        return blake2b(template_path.read_bytes(), digest_size=16).digest()
+
+    def get_notebook_key(self, parameters_values: dict[str, Any]) -> str:
+        """
+        Get the key identifying the content of a generated notebook, from the
+        generator version, the template content, the kernel name and the parameters
+        values.
+        Parameters
+        ----------
+        parameters_values : dict[str, Any]
+            Dictionary containing parameter names and their values.
         Returns
         -------
         str
-            The raw content of the preprocessed notebook template.
+            The hexadecimal key of the generated notebook.
+        """
+        nb_hash = blake2b(self.GENERATOR_VERSION.to_bytes(4), digest_size=16)
+        nb_hash.update(self.template_digest)
+        nb_hash.update(self.kernel_name.encode())
+        nb_hash.update(orjson.dumps(parameters_values, option=orjson.OPT_SORT_KEYS))
+        return nb_hash.hexdigest()
+
+    @cached_property
+    def params_cell_indexes(self) -> tuple[int, ...]:
+        """
+        Get the indexes of the cells tagged with `PARAMS_CELL_TAG` in the
+        preprocessed notebook template.
+        Returns
+        -------
+        tuple[int, ...]
+            The indexes of the parameters cells.
+        Raises
+        ------
+        ValueError
+            If no cell with the `PARAMS_CELL_TAG` tag is found.
+            If the cell with the `PARAMS_CELL_TAG` tag is found with no content.
         """
-        notebook = nb_read(self.template_path, NO_CONVERT)
+        cell_indexes: tuple[int, ...] = tuple(
+            cell_index
+            for cell_index, cell in enumerate(self.preprocessed_nb_template.cells)
+            if self.PARAMS_CELL_TAG in cell.metadata.get("tags", [])
+        )
+        if not cell_indexes:
+            raise ValueError(
+                f"No cell with '{self.PARAMS_CELL_TAG}' tag found in the notebook."
+            )
+        if not all(
+            self.preprocessed_nb_template.cells[cell_index].source
+            for cell_index in cell_indexes
+        ):
+            raise ValueError(
+                f"'{self.PARAMS_CELL_TAG}' cell found with no content in the notebook."
+            )
+        return cell_indexes
+
+    @cached_property
+    def params_cell_templates(
+        self,
+    ) -> dict[int, tuple[tuple[str, str | None, str | None, str | None], ...]]:
+        """
+        Get the parsed sources of the parameters cells of the preprocessed notebook
+        template, see `parse_params_cell_source`.
+        Returns
+        -------
+        dict[int, tuple[tuple[str, str | None, str | None, str | None], ...]]
+            The parsed source of each parameters cell, by cell index.
+        """
+        return {
+            cell_index: self.parse_params_cell_source(
+                self.preprocessed_nb_template.cells[cell_index].source
+            )
+            for cell_index in self.params_cell_indexes
+        }
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def parse_params_cell_source(
+        source: str,
+    ) -> tuple[tuple[str, str | None, str | None, str | None], ...]:
+        """
+        Parse the source of a parameters cell into its literal text chunks, each
+        followed by the replacement field to substitute after it, as `str.format`
+        does. The parsed source is cached, it is shared across the generated
+        notebooks.
+        Parameters
+        ----------
+        source : str
+            The source of the parameters cell, with `str.format` replacement fields,
+            e.g. `{parameter_name}`, `{parameter_name!r}` or `{parameter_name:.2f}`.
+        Returns
+        -------
+        tuple[tuple[str, str | None, str | None, str | None], ...]
+            The literal text chunks, followed by the field name, the format spec and
+            the conversion of their replacement field, all None for the trailing text
+            chunk.
+        Raises
+        ------
+        ValueError
+            If the source is not a valid format string.
+        """
+        return tuple(Formatter().parse(source))
+
+    @staticmethod
+    def render_params_cell_source(
+        cell_template: tuple[tuple[str, str | None, str | None, str | None], ...],
+        parameters_values: dict[str, Any],
+    ) -> str:
+        """
+        Fill in the parameters values in a parsed parameters cell source, see
+        `parse_params_cell_source`, as `str.format` does with keyword arguments.
+        Parameters
+        ----------
+        cell_template : tuple[tuple[str, str | None, str | None, str | None], ...]
+            The parsed source of the parameters cell.
+        parameters_values : dict[str, Any]
+            Dictionary containing parameter names and their values.
+        Returns
+        -------
+        str
+            The source of the parameters cell with the parameters values.
+        Raises
+        ------
+        KeyError
+            If a parameter of the parameters cell has no value.
+        """
+        formatter: Formatter = Formatter()
+        parts: list[str] = []
+        for literal, field_name, format_spec, conversion in cell_template:
+            parts.append(literal)
+            if field_name is None:
+                continue
+            # Resolve the attribute and index accesses, then convert and format
+            value: Any = formatter.get_field(field_name, (), parameters_values)[0]
+            value = formatter.convert_field(value, conversion)
+            if format_spec and "{" in format_spec:
+                # The format spec has nested replacement fields
+                format_spec = formatter.vformat(format_spec, (), parameters_values)
+            parts.append(formatter.format_field(value, format_spec or ""))
+        return "".join(parts)
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def preprocess_template(
+        template_path: Path, kernel_name: str, template_mtime_ns: int
+    ) -> NotebookNode:
+        """
+        Preprocess the notebook template by retaining only code cells, clearing outputs,
+        resetting execution counts, and adding a done statement to each cell, then
+        validate it.
+        Parameters
+        ----------
+        template_path : Path
+            Path to the template notebook file.
+        kernel_name : str
+            The name of the kernel to use for the generated notebooks.
+        template_mtime_ns : int
+            The modification time of the template notebook file, only used as a
+            cache key to invalidate the cached template when the file changes.
+        Returns
+        -------
+        NotebookNode
+            The preprocessed notebook template.
+        Raises
+        ------
+        ValidationError
+            If the preprocessed notebook template is not a valid notebook.
+        """
+        # Parse the template JSON directly, joining the multiline strings stored as
+        # lists of lines and stripping the transient metadata as nbformat does
+        notebook: NotebookNode = strip_transient(
+            rejoin_lines(nb_from_dict(orjson.loads(template_path.read_bytes())))
+        )
         notebook.metadata.kernelspec = {
-            "name": self.kernel_name,
+            "name": kernel_name,
             "language": "python",
-            "display_name": self.kernel_name,
+            "display_name": kernel_name,
         }
         # Retain only code cells
         notebook.cells = [cell for cell in notebook.cells if cell.cell_type == "code"]
         for cell in notebook.cells:
-            # Clear the outputs
-            cell.outputs = []
-            # Clear the execution_count
-            cell.execution_count = None
+            # Clear the outputs and the execution_count, if not already cleared
+            if cell.outputs:
+                cell.outputs = []
+            if cell.execution_count is not None:
+                cell.execution_count = None
             # Add the done_statement at the end of a cell source code
-            cell.source = self.add_statement_to_cell_source(
-                self.DONE_STATEMENT, cell.source
+            cell.source = NotebookGenerator.add_statement_to_cell_source(
+                NotebookGenerator.DONE_STATEMENT, cell.source
             )
             # Make the cell non-editable
             cell.metadata["editable"] = False
-        return nb_writes(notebook)
+        # Validate the preprocessed template once, the generated notebooks only differ
+        # from it by the source of their parameters cells
+        nb_validate(notebook)
+        return notebook
 
-    def generate_and_save(
-        self, parameters_values: dict[str, Any], output_path: Path
-    ) -> None:
+    def generate(self, parameters_values: dict[str, Any]) -> bytes:
         """
-        Generate a notebook by filling in the parameters in the template and save it to
-        the specified output path.
+        Generate a notebook by filling in the parameters in the template.
         Parameters
         ----------
         parameters_values : dict[str, Any]
             Dictionary containing parameter names and their values.
-        output_path : str
-            Path to the output notebook file.
+        Returns
+        -------
+        bytes
+            The serialized notebook.
         Raises
         ------
         ValueError
             If no cell with the `PARAMS_CELL_TAG` tag is found.
             If the cell with the `PARAMS_CELL_TAG` tag is found with no content.
+            If the cell with the `PARAMS_CELL_TAG` tag is not a valid format string.
+        KeyError
+            If a parameter of the cell with the `PARAMS_CELL_TAG` tag has no value.
         """
-        notebook = nb_reads(self.preprocessed_nb_template_raw_content, NO_CONVERT)
-        param_cell_found: bool = False
-        for cell in notebook.cells:
-            # Get the notebook cell tagged with the specified `PARAMS_CELL_TAG`
-            if self.PARAMS_CELL_TAG in cell.metadata.get("tags", []):
-                param_cell_found = True
-                if not cell.source:
-                    raise ValueError(
-                        f"'{self.PARAMS_CELL_TAG}' cell found with "
-                        "no content in the notebook."
-                    )
-                cell.source = cell.source.format(**parameters_values)
-
-        if not param_cell_found:
-            raise ValueError(
-                f"No cell with '{self.PARAMS_CELL_TAG}' tag found in the notebook."
+        # Shallow copy the template, only the parameters cells are rebuilt, the other
+        # cells are shared with the template
+        notebook: NotebookNode = copy(self.preprocessed_nb_template)
+        notebook.cells = list(notebook.cells)
+        for cell_index, cell_template in self.params_cell_templates.items():
+            # Fill in the parameters values in the pre-parsed cell source
+            source: str = self.render_params_cell_source(
+                cell_template, parameters_values
+            )
+            notebook.cells[cell_index] = NotebookNode(
+                notebook.cells[cell_index], source=source
             )
 
-        # Write the modified notebook to the output path
-        nb_write(notebook, output_path)
+        return orjson.dumps(notebook, option=self.ORJSON_OPTIONS)
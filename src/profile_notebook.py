@@ -1,4 +1,9 @@
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any
+
+from selenium.webdriver import Chrome
 
 from src.jupyterlab_helper import JupyterLabHelper
 from src.profiler import Profiler
@@ -8,13 +13,29 @@ from src.utils import ProfilerContext, get_logger
 logger: logging.Logger = get_logger()
 
 
-def profile_notebook(context: ProfilerContext) -> None:
+def profile_notebook(
+    context: ProfilerContext,
+    exclusive: bool = True,
+    driver: Chrome | None = None,
+    jupyterlab_helper: JupyterLabHelper | None = None,
+) -> None:
     """
     Profile the notebook at the specified URL using Selenium.
     Parameters
     ----------
     context : ProfilerContext
         The context containing all necessary parameters for profiling.
+    exclusive : bool, optional
+        Whether the profiling run has the JupyterLab instance to itself (default:
+        True). If True, all sessions are cleared and the kernel is restarted before
+        profiling; if False, only the sessions opened on this notebook are cleared,
+        after profiling, so that concurrent runs are left untouched.
+    driver : Chrome | None, optional
+        The Selenium Chrome WebDriver instance to reuse, left open after profiling
+        (default: None, a new browser is launched and quit).
+    jupyterlab_helper : JupyterLabHelper | None, optional
+        The JupyterLab helper to reuse, left open after profiling (default: None, a
+        new helper is created and closed).
     Raises
     ------
     FileNotFoundError
@@ -24,22 +45,79 @@ def profile_notebook(context: ProfilerContext) -> None:
     Exception
         For any other unexpected errors.
     """
-    logger.debug(f"Starting profiler with {context}")
-
-    # Initialize JupyterLab helper
-    jupyterlab_helper: JupyterLabHelper = JupyterLabHelper(context.url, context.token)
-    nb_filename: str = jupyterlab_helper.get_notebook_filename(context.nb_input_path)
-
-    # Prepare JupyterLab environment
-    jupyterlab_helper.clear_all_jupyterlab_sessions()
-    jupyterlab_helper.restart_kernel(context.kernel_name)
-    jupyterlab_helper.upload_notebook(context.nb_input_path)
-
-    try:
-        # Start Selenium and run the profiler
-        profiler: Profiler = Profiler(context, jupyterlab_helper)
-        profiler.run_notebook()
-    finally:
-        profiler.close()
-        # Clean up by deleting the uploaded notebook
-        jupyterlab_helper.delete_notebook(nb_filename)
+    logger.debug("Starting profiler with %s", context)
+
+    # Initialize JupyterLab helper, unless shared by the caller, closed on exit
+    with (
+        nullcontext(jupyterlab_helper)
+        if jupyterlab_helper is not None
+        else JupyterLabHelper(context.url, context.token)
+    ) as jupyterlab_helper:
+        nb_filename: str = jupyterlab_helper.get_notebook_filename(
+            context.nb_input_path
+        )
+
+        # Read the notebook once, its content is shared by the upload and the profiler
+        nb_content: bytes = context.nb_input_path.read_bytes()
+
+        # Prepare JupyterLab environment, uploading the notebook and launching the
+        # browser, unless shared by the caller, meanwhile
+        launched_driver: Chrome | None = None
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            upload: Future[dict[str, Any] | None] = executor.submit(
+                jupyterlab_helper.upload_notebook_if_changed
+                if context.keep_notebook
+                else jupyterlab_helper.upload_notebook,
+                context.nb_input_path,
+                nb_content,
+            )
+            launch: Future[Chrome] | None = (
+                executor.submit(Profiler.create_web_driver, context.headless)
+                if driver is None
+                else None
+            )
+            try:
+                if exclusive:
+                    jupyterlab_helper.clear_all_jupyterlab_sessions()
+                    jupyterlab_helper.restart_kernel(context.kernel_name)
+                upload.result()
+                if launch is not None:
+                    driver = launched_driver = launch.result()
+            except BaseException:
+                # Do not leave the notebook behind, unless kept, nor the browser
+                # open if the preparation failed
+                if not context.keep_notebook and upload.exception() is None:
+                    jupyterlab_helper.delete_notebook(nb_filename)
+                if launch is not None and launch.exception() is None:
+                    launch.result().quit()
+                raise
+
+        profiler: Profiler | None = None
+        try:
+            # Start Selenium and run the profiler
+            profiler = Profiler(
+                context,
+                jupyterlab_helper,
+                nb_content,
+                shared_driver=driver,
+                exclusive=exclusive,
+            )
+            profiler.run_notebook()
+        finally:
+            # Clean up by deleting the uploaded notebook, unless kept, meanwhile
+            # closing the profiler and shutting down the notebook sessions, if other
+            # runs may be sharing the JupyterLab instance
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                deletion: Future[None] | None = (
+                    executor.submit(jupyterlab_helper.delete_notebook, nb_filename)
+                    if not context.keep_notebook
+                    else None
+                )
+                if profiler is not None:
+                    profiler.close()
+                if launched_driver is not None:
+                    launched_driver.quit()
+                if not exclusive:
+                    jupyterlab_helper.clear_all_jupyterlab_sessions(nb_filename)
+                if deletion is not None:
+                    deletion.result()
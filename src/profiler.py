@@ -1,21 +1,25 @@
-import json
 import logging
 import random
-from collections import OrderedDict
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
 from dataclasses import dataclass, field
 from datetime import datetime
 from functools import cached_property
-from io import BytesIO
 from pathlib import Path
 from time import perf_counter_ns
 from typing import Any, ClassVar
 
+import orjson
 from chromedriver_py import binary_path  # type: ignore[import-untyped]
-from nbformat import NO_CONVERT, NotebookNode
-from nbformat import read as nb_read
-from PIL import Image
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from nbformat import NotebookNode
+from nbformat import from_dict as nb_from_dict
+from nbformat.v4.rwbase import rejoin_lines
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
 from selenium.webdriver import Chrome, ChromeOptions, ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webelement import WebElement
@@ -32,7 +36,6 @@ from src.utils import (
     MEGABYTE,
     CellExecutionStatus,
     ProfilerContext,
-    explicit_wait,
     get_logger,
     get_notebook_cell_indexes_for_tag,
     get_notebook_parameters,
@@ -52,6 +55,16 @@ class Profiler:
         The context containing all necessary parameters for profiling.
     jupyterlab_helper : JupyterLabHelper
         The JupyterLab helper instance to interact with JupyterLab.
+    nb_content : bytes
+        The raw JSON content of the notebook, if already read from the input
+        notebook file, otherwise the input notebook file is read.
+    shared_driver : Chrome | None
+        The Selenium Chrome WebDriver instance shared across profiling runs, if any,
+        otherwise a new one is launched (and quit) by the profiler.
+    exclusive : bool
+        Whether the profiling run has the JupyterLab instance to itself. If False,
+        the kernel of the notebook is only looked up from the session opened on the
+        notebook, as kernels of the same name may be used by concurrent runs.
     screenshots_dir_path : Path | None
         Path to the directory to where screenshots will be stored.
     driver : Chrome
@@ -60,7 +73,7 @@ class Profiler:
         The visualization element instance.
     executable_cells : tuple[ExecutableCell, ...]
         The tuple of executable cells in the notebook.
-    nb_params_dict : OrderedDict[str, Any]
+    nb_params_dict : dict[str, Any]
         The ordered dictionary of notebook parameters.
     ui_network_throttling_value : float | None
         The UI network throttling value, if any.
@@ -73,15 +86,16 @@ class Profiler:
 
     context: ProfilerContext
     jupyterlab_helper: JupyterLabHelper
+    nb_content: bytes = field(default=b"", repr=False)
+    shared_driver: Chrome | None = field(default=None, repr=False)
+    exclusive: bool = True
     screenshots_dir_path: Path | None = field(default=None, repr=False, init=False)
     driver: Chrome = field(repr=False, init=False)
     viz_element: VizElement | None = field(default=None, repr=False, init=False)
     executable_cells: tuple[ExecutableCell, ...] = field(
         default_factory=tuple, repr=False, init=False
     )
-    nb_params_dict: OrderedDict[str, Any] = field(
-        default_factory=OrderedDict, repr=False, init=False
-    )
+    nb_params_dict: dict[str, Any] = field(default_factory=dict, repr=False, init=False)
     ui_network_throttling_value: float | None = field(
         default=None, repr=False, init=False
     )
@@ -104,10 +118,20 @@ class Profiler:
         f"--window-size={VIEWPORT_SIZE['width']},{VIEWPORT_SIZE['height']}"
     )
 
-    # CSS style to disable the pulsing animation that can interfere
-    # with screenshots taking
+    # CSS style to disable the pulsing animation, and to end almost right away the
+    # other animations, transitions and the caret blinking, that can interfere with
+    # screenshots taking. The durations are reduced to 0.01ms rather than zeroed,
+    # as a transition with no duration nor delay does not start, and would not fire
+    # the end events the UI may be waiting for
     PAGE_STYLE_TAG_CONTENT: ClassVar[str] = (
-        ".viewer-label.pulse {animation: none !important;}"
+        ".viewer-label.pulse {animation: none !important;} "
+        "*, *::before, *::after {"
+        "animation-duration: 0.01ms !important; "
+        "animation-delay: 0s !important; "
+        "animation-iteration-count: 1 !important; "
+        "transition-duration: 0.01ms !important; "
+        "transition-delay: 0s !important; "
+        "caret-color: transparent !important;}"
     )
 
     # Selector for the notebook element
@@ -118,6 +142,21 @@ class Profiler:
         ".jp-WindowedPanel-viewport>.lm-Widget.jp-Cell.jp-CodeCell.jp-Notebook-cell"
     )
 
+    # Max seconds to wait for all the code cells to be rendered, and seconds between
+    # the checks
+    CELLS_RENDER_TIMEOUT: ClassVar[float] = 30
+    CELLS_RENDER_POLL_FREQUENCY: ClassVar[float] = 0.1
+
+    # Script counting the elements matching a selector, without returning them
+    COUNT_ELEMENTS_SCRIPT: ClassVar[str] = (
+        "return document.querySelectorAll(arguments[0]).length;"
+    )
+
+    # Max seconds to wait for the kernel of the notebook to be started and idle,
+    # and seconds between the checks
+    KERNEL_READY_TIMEOUT: ClassVar[float] = 30
+    KERNEL_READY_POLL_FREQUENCY: ClassVar[float] = 0.25
+
     # The value of the cell tag marked as to skip metrics collections during profiling
     SKIP_PROFILING_CELL_TAG: ClassVar[str] = "skip_profiling"
 
@@ -127,12 +166,55 @@ class Profiler:
     # The value of the cell tag holding the notebook parameters
     PARAMETERS_CELL_TAG: ClassVar[str] = "parameters"
 
+    # URL patterns of the fonts and media requests blocked on demand
+    BLOCKED_URL_PATTERNS: ClassVar[list[str]] = [
+        "*.woff",
+        "*.woff2",
+        "*.ttf",
+        "*.otf",
+        "*.eot",
+        "*.mp3",
+        "*.mp4",
+        "*.ogg",
+        "*.webm",
+    ]
+
     # The parameter name holding the ui_network_throttling value
     UI_NETWORK_THROTTLING_PARAM: ClassVar[str] = "ui_network_throttling"
 
     # Selector for the jdaviz app viz element
     VIZ_ELEMENT_SELECTOR: ClassVar[str] = ".jdaviz.imviz"
 
+    # Asynchronous script waiting, in the page, for an element matching a selector
+    # to be attached to the document, and passing it to the callback, or null once
+    # the timeout (in seconds) has expired
+    WAIT_FOR_ELEMENT_SCRIPT: ClassVar[str] = """
+        const [selector, timeout, callback] = arguments;
+        const element = document.querySelector(selector);
+        if (element || timeout <= 0) {
+            callback(element);
+            return;
+        }
+        const observer = new MutationObserver(() => {
+            const element = document.querySelector(selector);
+            if (element) {
+                observer.disconnect();
+                clearTimeout(timer);
+                callback(element);
+            }
+        });
+        const timer = setTimeout(() => {
+            observer.disconnect();
+            callback(null);
+        }, timeout * 1000);
+        observer.observe(document, { childList: true, subtree: true });
+    """
+
+    # Max seconds to wait for the kernel to be idle before executing the next cell,
+    # and seconds between the kernel execution state checks
+    KERNEL_IDLE_TIMEOUT: ClassVar[float] = 2
+    KERNEL_IDLE_POLL_FREQUENCY: ClassVar[float] = 0.1
+
     def __post_init__(self) -> None:
         """Post-initialization to set up screenshots directory path."""
         if self.context.screenshots_dir_path is not None:
@@ -146,7 +228,8 @@ class Profiler:
     @cached_property
     def kernel_id(self) -> str:
         """
-        Get the kernel id from the kernel name.
+        Get the kernel id from the session opened on the notebook, falling back to
+        the kernel name if the run is exclusive.
         Returns
         -------
         str
@@ -154,9 +237,20 @@ class Profiler:
         Raises
         -------
         Exception
-            If no kernel id is found for the given kernel name.
+            If no kernel id is found for the notebook, or for the given kernel name.
         """
-        kernel_id: str | None = self.jupyterlab_helper.get_kernel_id_from_name(
+        kernel_id: str | None = self.jupyterlab_helper.get_kernel_id_from_notebook(
+            self.notebook_filename
+        )
+        if kernel_id is not None:
+            return kernel_id
+        if not self.exclusive:
+            # A kernel of the same name may be used by a concurrent run, whose usage
+            # would be recorded for this notebook
+            raise Exception(
+                f"No kernel id found for the session of {self.notebook_filename}."
+            )
+        kernel_id = self.jupyterlab_helper.get_kernel_id_from_name(
             self.context.kernel_name
         )
         if kernel_id is None:
@@ -183,15 +277,17 @@ class Profiler:
         logger.info("Starting profiling...")
         self.setup_profiler()
         self.setup_web_driver()
+        self.setup_resources_blocking()
         self.go_to_notebook_url()
         self.setup_network_throttling()
         self.apply_custom_settings_to_ui()
-        explicit_wait(5)  # Wait a bit to ensure the page is fully loaded
+        self.wait_for_notebook_cells_to_render()
+        self.wait_for_kernel_ready()
         self.build_executable_cells_from_ui()
         with logging_redirect_tqdm([logger]):
             self.execute_notebook_cells()
         self.metrics.compute()
-        logger.info(str(self.metrics))
+        logger.info("%s", self.metrics)
         self.save_notebook_metrics_to_csv()
         logger.info("Profiling completed.")
 
@@ -199,8 +295,13 @@ class Profiler:
         """
         Set up the profiler by reading the notebook and extracting relevant information.
         """
-        # Read the notebook file
-        nb: NotebookNode = nb_read(self.context.nb_input_path, NO_CONVERT)
+        # Read the notebook, from its content if already available, joining the
+        # multiline strings stored as lists of lines as nbformat does
+        nb: NotebookNode = rejoin_lines(
+            nb_from_dict(
+                orjson.loads(self.nb_content or self.context.nb_input_path.read_bytes())
+            )
+        )
         # Extract cell indexes for skip_profiling and wait_for_viz tags
         self.skip_profiling_cell_indexes = frozenset(
             get_notebook_cell_indexes_for_tag(nb, self.SKIP_PROFILING_CELL_TAG)
@@ -215,20 +316,42 @@ class Profiler:
 
     def setup_web_driver(self) -> None:
         """
-        Set up the Selenium browser and page.
+        Set up the Selenium browser and page, reusing the shared driver if any.
+        """
+        if self.shared_driver is not None:
+            logger.debug("Reusing the shared web driver.")
+            self.driver = self.shared_driver
+            return
+        self.driver = self.create_web_driver(self.context.headless)
+
+    @classmethod
+    def create_web_driver(cls, headless: bool) -> Chrome:
+        """
+        Launch a Selenium Chrome browser suitable for profiling notebooks.
+        Parameters
+        ----------
+        headless : bool
+            Whether to run in headless mode.
+        Returns
+        -------
+        Chrome
+            The Selenium Chrome WebDriver instance.
         """
         options: ChromeOptions = ChromeOptions()
         # Set window size option
-        options.add_argument(self.WINDOW_SIZE_OPTION)
+        options.add_argument(cls.WINDOW_SIZE_OPTION)
         # Enable performance logging to capture network events
         options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        # Accept the "leave page" prompts, raised when a reused browser navigates
+        # away from a previously profiled notebook
+        options.unhandled_prompt_behavior = "accept"
 
         # Set headless mode if specified
-        if self.context.headless:
+        if headless:
             options.add_argument("--headless=new")
 
         # Launch the browser and create a new page
-        self.driver: Chrome = Chrome(
+        return Chrome(
             options=options,
             service=ChromeService(executable_path=binary_path),
         )
@@ -239,7 +362,7 @@ class Profiler:
         """
         # Navigate to the notebook URL
         url: str = self.jupyterlab_helper.get_notebook_url(self.context.nb_input_path)
-        logger.info(f"Navigating to {url}")
+        logger.info("Navigating to %s", url)
         self.driver.get(url)
 
         # Login if authentication is required
@@ -274,6 +397,19 @@ class Profiler:
 
         logger.info("Login successful.")
 
+    def setup_resources_blocking(self) -> None:
+        """
+        Block the fonts and media requests of the notebook page, if requested, since
+        they are not needed to detect the cells execution.
+        """
+        if not self.context.block_resources:
+            return
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd(
+            "Network.setBlockedURLs", {"urls": self.BLOCKED_URL_PATTERNS}
+        )
+        logger.debug("Blocked the requests matching %s.", self.BLOCKED_URL_PATTERNS)
+
     def setup_network_throttling(self) -> None:
         """
         Set up network throttling if the parameter is specified in the
@@ -284,6 +420,11 @@ class Profiler:
                 "No network throttling parameter found, "
                 "hence no network throttling applied."
             )
+            # Reset the network conditions possibly left by a previous profiling
+            # run on the shared driver (raises if none were set)
+            if self.shared_driver is not None:
+                with suppress(WebDriverException):
+                    self.driver.delete_network_conditions()
             return
         # If ui_network_throttling_value is not None, set up the network throttling
         download_throughput: int = self.nb_params_dict[self.UI_NETWORK_THROTTLING_PARAM]
@@ -295,7 +436,7 @@ class Profiler:
             upload_throughput=-1,
         )
         logger.debug(
-            f"Network throttling download_throughput={download_throughput} applied."
+            "Network throttling download_throughput=%s applied.", download_throughput
         )
 
     def apply_custom_settings_to_ui(self) -> None:
@@ -306,7 +447,7 @@ class Profiler:
         self.driver.set_window_size(
             self.VIEWPORT_SIZE["width"], self.VIEWPORT_SIZE["height"]
         )
-        logger.debug(f"Page viewport set to {self.VIEWPORT_SIZE}.")
+        logger.debug("Page viewport set to %s.", self.VIEWPORT_SIZE)
 
         # Apply custom CSS styles
         self.driver.execute_script(
@@ -316,6 +457,63 @@ class Profiler:
         )
         logger.debug("Page style added.")
 
+    def wait_for_notebook_cells_to_render(self) -> None:
+        """
+        Wait for all the code cells of the notebook to be rendered in the UI, rather
+        than for a fixed amount of time.
+        """
+        try:
+            WebDriverWait(
+                self.driver,
+                timeout=self.CELLS_RENDER_TIMEOUT,
+                poll_frequency=self.CELLS_RENDER_POLL_FREQUENCY,
+            ).until(
+                lambda driver: (
+                    driver.execute_script(
+                        self.COUNT_ELEMENTS_SCRIPT, self.NB_CELLS_SELECTOR
+                    )
+                    == self.metrics.total_cells
+                )
+            )
+            logger.debug("Notebook cells rendered.")
+        except TimeoutException:
+            logger.warning(
+                "Notebook cells not all rendered after %s seconds.",
+                self.CELLS_RENDER_TIMEOUT,
+            )
+
+    def wait_for_kernel_ready(self) -> None:
+        """
+        Wait for the kernel of the notebook session opened by the UI to be started
+        and idle, so that the first cell execution does not include the kernel
+        startup.
+        """
+        try:
+            WebDriverWait(
+                self.driver,
+                timeout=self.KERNEL_READY_TIMEOUT,
+                poll_frequency=self.KERNEL_READY_POLL_FREQUENCY,
+            ).until(lambda _: self.is_kernel_ready())
+            logger.debug("Notebook kernel ready.")
+        except TimeoutException:
+            logger.warning(
+                "Notebook kernel not ready after %s seconds.", self.KERNEL_READY_TIMEOUT
+            )
+
+    def is_kernel_ready(self) -> bool:
+        """
+        Check if the kernel of the notebook session opened by the UI is started and
+        idle.
+        Returns
+        -------
+        bool
+            True if the kernel is ready, False otherwise.
+        """
+        kernel: dict[str, Any] | None = self.jupyterlab_helper.get_kernel_from_notebook(
+            self.notebook_filename
+        )
+        return kernel is not None and kernel.get("execution_state") == "idle"
+
     def build_executable_cells_from_ui(self) -> None:
         """
         Collect all code cells in the notebook from the loaded ui and return them
@@ -342,7 +540,8 @@ class Profiler:
             for i, nb_ui_cell in enumerate(nb_ui_cells, 1)
         )
         logger.info(
-            f"Number of executable cells in the notebook: {len(self.executable_cells)}."
+            "Number of executable cells in the notebook: %s.",
+            len(self.executable_cells),
         )
 
     def execute_notebook_cells(self) -> None:
@@ -352,30 +551,79 @@ class Profiler:
         logger.info("Executing notebook cells...")
 
         # Execute each cell and collect metrics
-        for ec in tqdm(
-            self.executable_cells,
-            desc="Notebook Cells Execution Progress",
-            position=1,
-            leave=False,
+        for position, ec in enumerate(
+            tqdm(
+                self.executable_cells,
+                desc="Notebook Cells Execution Progress",
+                position=1,
+                leave=False,
+            )
         ):
             try:
+                if self.context.pipeline_depth > 0:
+                    # Queue the next cells while this one is executing
+                    self.queue_next_cells(position)
                 # Execute the cell
                 ec.execute()
             except Exception as e:
-                logger.exception(f"Exception while executing cell {ec.index}: {e}")
-            logging.info(f"Cell execution: {ec.metrics.execution_status}")
+                logger.exception("Exception while executing cell %s: %s", ec.index, e)
+            logger.info("Cell %s execution: %s.", ec.index, ec.metrics.execution_status)
             # Collect metrics from the executed cell
             self.collect_executable_cell_metrics(ec)
-            # Save cell metrics to CSV file
-            self.save_cell_metrics_to_csv(ec)
+            # Save cell metrics to CSV file, in the background, if requested
+            if self.context.cell_metrics_file_path is not None:
+                self.files_writer.submit(self.save_cell_metrics_to_csv, ec)
+            else:
+                logger.debug("Not saving cell metrics.")
 
             # If the cell execution did not complete successfully,
             # stop further executions
             if ec.metrics.execution_status != CellExecutionStatus.COMPLETED:
                 break
 
-            # Wait a bit to ensure stability before moving to the next cell
-            explicit_wait(2)
+            # Wait for the kernel to be idle before moving to the next cell, unless
+            # it is already queued
+            next_position: int = position + 1
+            if not (
+                next_position < len(self.executable_cells)
+                and self.executable_cells[next_position].queued
+            ):
+                self.wait_for_kernel_idle()
+
+    def wait_for_kernel_idle(self) -> None:
+        """
+        Wait for the kernel to be idle, up to `KERNEL_IDLE_TIMEOUT` seconds, returning
+        as soon as it is.
+        """
+        with suppress(TimeoutException):
+            WebDriverWait(
+                self.driver,
+                timeout=self.KERNEL_IDLE_TIMEOUT,
+                poll_frequency=self.KERNEL_IDLE_POLL_FREQUENCY,
+            ).until(lambda _: not self.is_kernel_busy())
+
+    def queue_next_cells(self, position: int) -> None:
+        """
+        Queue the execution of up to `pipeline_depth` cells following the cell at
+        the given position, and before the next cell waiting for viz changes, so
+        that the kernel runs them without waiting for their outputs to be checked.
+        The cells are not queued after a cell waiting for viz changes, whose viz
+        element must only be changed by it.
+        Parameters
+        ----------
+        position : int
+            The position of the cell about to be executed in the executable cells.
+        """
+        if self.executable_cells[position].wait_for_viz:
+            return
+        # Queue the cell itself first, the cells are executed in order
+        for ec in self.executable_cells[
+            position : position + self.context.pipeline_depth + 1
+        ]:
+            if ec.wait_for_viz:
+                break
+            if not ec.queued:
+                ec.queue()
 
     def collect_executable_cell_metrics(self, executable_cell: ExecutableCell) -> None:
         """
@@ -413,22 +661,24 @@ class Profiler:
 
     def save_cell_metrics_to_csv(self, executable_cell: ExecutableCell) -> None:
         """
-        Save the profiling cell metrics to a CSV file.
+        Save the profiling cell metrics to the cell metrics CSV file, which must be
+        provided.
+        Parameters
+        ----------
+        executable_cell : ExecutableCell
+            The executed cell, whose metrics are saved.
         """
-        # If notebook_metrics_file_path is not provided, do not save metrics
-        if self.context.cell_metrics_file_path is None:
-            logger.debug("Not saving cell metrics.")
-            return
+        assert self.context.cell_metrics_file_path is not None
         try:
             executable_cell.metrics.save_metrics_to_csv(
                 self.notebook_filename,
                 self.nb_params_dict,
                 self.context.cell_metrics_file_path,
             )
-            logger.info(f"Metrics saved to {self.context.cell_metrics_file_path}")
+            logger.info("Metrics saved to %s", self.context.cell_metrics_file_path)
         except Exception as e:
             # In case of an exception: log it and move on (do not block!)
-            logger.exception(f"An exception occurred during metrics saving: {e}")
+            logger.exception("An exception occurred during metrics saving: %s", e)
 
     def save_notebook_metrics_to_csv(self) -> None:
         """
@@ -445,10 +695,10 @@ class Profiler:
                 self.context.notebook_metrics_file_path,
             )
 
-            logger.info(f"Metrics saved to {self.context.notebook_metrics_file_path}")
+            logger.info("Metrics saved to %s", self.context.notebook_metrics_file_path)
         except Exception as e:
             # In case of an exception: log it and move on (do not block!)
-            logger.exception(f"An exception occurred during metrics saving: {e}")
+            logger.exception("An exception occurred during metrics saving: %s", e)
 
     def wait_for_notebook_to_load(self) -> None:
         """
@@ -470,8 +720,9 @@ class Profiler:
                 return
             except TimeoutException:
                 logger.warning(
-                    "Error waiting for notebook to load, "
-                    f"retrying... {attempt + 1}/{max_retries}."
+                    "Error waiting for notebook to load, retrying... %s/%s.",
+                    attempt + 1,
+                    max_retries,
                 )
                 # Double the delay for the next attempt
                 retry_delay *= 2
@@ -481,8 +732,18 @@ class Profiler:
 
     def close(self) -> None:
         """
-        Close the Selenium driver.
-        """
+        Close the Selenium driver, unless it is shared across profiling runs, in which
+        case it is navigated away from the notebook page.
+        """
+        if "files_writer" in self.__dict__:
+            # Wait for the cell metrics and the logged screenshots to be saved
+            self.files_writer.shutdown()
+        if self.shared_driver is not None:
+            # Leave the notebook page, so that the UI does not save the notebook nor
+            # reopen its session once deleted, while the driver is back in the pool
+            self.shared_driver.get("about:blank")
+            logger.debug("Shared driver left open.")
+            return
         self.driver is not None and hasattr(self.driver, "quit") and self.driver.quit()  # type: ignore[func-returns-value]
         logger.debug("Driver closed.")
 
@@ -516,25 +777,46 @@ class Profiler:
                 entry["timestamp"] / 1000
             )
             if timestamp_start < timestamp_entry < timestamp_end:
-                message: dict[str, Any] = json.loads(entry.get("message", {})).get(
+                message: dict[str, Any] = orjson.loads(entry.get("message", "{}")).get(
                     "message", {}
                 )
                 if message.get("method", "") == "Network.dataReceived":
                     data_received += message.get("params", {}).get("dataLength", 0)
         return data_received / MEGABYTE
 
-    def detect_viz_element(self) -> None:
+    def detect_viz_element(self, timeout: float = 0) -> None:
         """
-        Detect the viz element based on the CSS classes given to the viz app.
-        """
-        viz_element: WebElement = self.driver.find_element(
-            By.CSS_SELECTOR, self.VIZ_ELEMENT_SELECTOR
+        Detect the viz element based on the CSS classes given to the viz app, if
+        rendered in the page within the given timeout.
+        Parameters
+        ----------
+        timeout : float, optional
+            Max seconds to wait for the viz element to be rendered (default: 0, a
+            single lookup).
+        """
+        # Wait for the viz element in the page, where the document mutations are
+        # observed, rather than polling it, in a single round trip
+        viz_element: WebElement | None = self.driver.execute_async_script(
+            self.WAIT_FOR_ELEMENT_SCRIPT, self.VIZ_ELEMENT_SELECTOR, timeout
         )
-        if viz_element:
-            self.viz_element: VizElement = VizElement(
-                element=viz_element, profiler=self
-            )
+        if viz_element is not None:
+            self.viz_element = VizElement(element=viz_element, profiler=self)
             logger.debug("Viz element detected and assigned.")
+        else:
+            logger.debug("Viz element not rendered yet.")
+
+    @cached_property
+    def files_writer(self) -> ThreadPoolExecutor:
+        """
+        Get the executor saving the cell metrics and the logged screenshots in the
+        background, so that the cells execution does not wait for the files to be
+        written.
+        Returns
+        -------
+        ThreadPoolExecutor
+            The single thread executor saving the files, in submission order.
+        """
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="files_writer")
 
     def log_screenshots(self, cell_index: int, screenshots: Iterable[bytes]) -> None:
         """
@@ -546,27 +828,41 @@ class Profiler:
         screenshots : Iterable[bytes]
             The Iterable of screenshot (in bytes) to save.
         """
-        try:
-            if self.screenshots_dir_path is None:
-                logger.debug("Not logging screenshots.")
-                return
+        if self.screenshots_dir_path is None:
+            logger.debug("Not logging screenshots.")
+            return
 
+        file_path_name: Path = (
+            self.screenshots_dir_path / f"{perf_counter_ns()}_cell{cell_index}"
+        )
+        self.files_writer.submit(
+            self.save_screenshots, file_path_name, tuple(screenshots)
+        )
+
+    @staticmethod
+    def save_screenshots(file_path_name: Path, screenshots: tuple[bytes, ...]) -> None:
+        """
+        Save screenshots to PNG files.
+        Parameters
+        ----------
+        file_path_name : Path
+            The path of the files, without the screenshot index and extension.
+        screenshots : tuple[bytes, ...]
+            The screenshots (in bytes) to save.
+        """
+        try:
             # Log screenshots
             logger.debug("Logging screenshots...")
 
-            file_path_name: Path = (
-                self.screenshots_dir_path / f"{perf_counter_ns()}_cell{cell_index}"
-            )
-
             for i, screenshot in enumerate(screenshots):
-                # Save first screenshot as PNG
-                Image.open(BytesIO(screenshot)).save(f"{file_path_name}_{i}.png")
+                # The screenshots are already PNG images, save them as they are
+                Path(f"{file_path_name}_{i}.png").write_bytes(screenshot)
 
             logger.debug("Screenshots logged.")
 
         except Exception as e:
             # In case of an exception: log it and move on (do not block!)
-            logger.exception(f"An exception occurred during screenshots logging: {e}")
+            logger.exception("An exception occurred during screenshots logging: %s", e)
 
     def get_current_kernel_pid(self) -> int | None:
         """
@@ -578,6 +874,19 @@ class Profiler:
         """
         return self.jupyterlab_helper.get_current_kernel_pid(self.kernel_id)
 
+    def is_kernel_busy(self) -> bool:
+        """
+        Check if the kernel is busy, running code or handling the messages sent by
+        the widgets of the page.
+        Returns
+        -------
+        bool
+            True if the kernel is busy, False otherwise.
+        """
+        return (
+            self.jupyterlab_helper.get_kernel_execution_state(self.kernel_id) == "busy"
+        )
+
     def get_kernel_usage(self) -> dict[str, Any]:
         """
         Get the current resource usage of the kernel.
@@ -1,15 +1,16 @@
 import ast
 import itertools
-import json
 import logging
 import os
-from collections import OrderedDict
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 from enum import StrEnum, unique
+from math import prod
 from pathlib import Path
-from time import sleep, time
+from time import perf_counter, sleep
 from typing import Any
 
+import orjson
 from dotenv import load_dotenv
 from nbformat import NotebookNode
 
@@ -49,6 +50,17 @@ class ProfilerContext:
     cell_metrics_file_path : Path | None
         Path to the file to where the cell metrics will be stored, if not passed as
         an argument, cell metrics will not be saved to file.
+    block_resources : bool
+        Whether to block the fonts and media requests of the notebook page, which
+        are not needed to detect the cells execution (default: False).
+    pipeline_depth : int
+        Number of cells not waiting for viz changes queued for execution while
+        the previous cells are still executing (default: 0, the cells are executed
+        one at a time).
+    keep_notebook : bool
+        Whether to keep the uploaded notebook in the JupyterLab instance after
+        profiling, so that the next runs do not upload it again while it is
+        unchanged (default: False, the notebook is uploaded and deleted by each run).
     """
 
     kernel_name: str
@@ -62,6 +74,9 @@ class ProfilerContext:
     screenshots_dir_path: Path | None = field(default=None)
     notebook_metrics_file_path: Path | None = field(default=None)
     cell_metrics_file_path: Path | None = field(default=None)
+    block_resources: bool = False
+    pipeline_depth: int = 0
+    keep_notebook: bool = False
 
     def __post_init__(self) -> None:
         """
@@ -85,6 +100,9 @@ class ProfilerContext:
                 f"Screenshots Dir Path: {self.screenshots_dir_path}",
                 f"Notebook Metrics File Path: {self.notebook_metrics_file_path}",
                 f"Cell Metrics File Path: {self.cell_metrics_file_path}",
+                f"Block Resources: {self.block_resources}",
+                f"Pipeline Depth: {self.pipeline_depth}",
+                f"Keep Notebook: {self.keep_notebook}",
             )
         )
 
@@ -115,6 +133,8 @@ class CellExecutionStatus(StrEnum):
 def set_logger(log_level: str = "INFO", log_file: Path | None = None) -> None:
     """
     Set up the logger with the specified log level.
+    The handlers are only added the first time the logger is set up, subsequent
+    calls only update the log level.
     Parameters
     ----------
     log_level : str
@@ -131,6 +151,9 @@ def set_logger(log_level: str = "INFO", log_file: Path | None = None) -> None:
     )
     _logger: logging.Logger = logging.getLogger(LOGGER_NAME)
     _logger.setLevel(log_level)
+    # Do not add the handlers again if the logger has already been set up
+    if _logger.handlers:
+        return
     #  Add console handler
     console_handler: logging.StreamHandler = logging.StreamHandler()
     console_handler.setFormatter(logging_formatter)
@@ -167,17 +190,19 @@ def explicit_wait(seconds: int | float) -> None:
 
 def elapsed_time(from_time: float = 0) -> float:
     """
-    Calculate the elapsed time since a given starting time.
+    Calculate the elapsed time since a given starting time, measured with a
+    monotonic, high-resolution clock unaffected by system clock adjustments.
     Parameters
     ----------
     from_time : float, optional
-        The starting time in seconds since the epoch. Default is 0.
+        The starting time in seconds, as returned by `elapsed_time()`. Default is 0,
+        returning the current time of the clock, with an undefined reference point.
     Returns
     -------
     float
         The elapsed time in seconds.
     """
-    return time() - from_time
+    return perf_counter() - from_time
 
 
 def load_dict_from_json_file(file_path: Path) -> dict[str, Any]:
@@ -185,7 +210,7 @@ def load_dict_from_json_file(file_path: Path) -> dict[str, Any]:
     Load a dictionary of key-value pairs from a JSON file.
     Parameters
     ----------
-    file_path : str
+    file_path : Path
         Path to the JSON file.
     Returns
     -------
@@ -198,16 +223,15 @@ def load_dict_from_json_file(file_path: Path) -> dict[str, Any]:
     ValueError
         If the JSON file is empty or improperly formatted.
     """
-    with file_path.open("r") as f:
-        if not (data := json.loads(f.read())):
-            raise ValueError(f"No data found in {file_path}")
-        return data
+    if not (data := orjson.loads(file_path.read_bytes())):
+        raise ValueError(f"No data found in {file_path}")
+    return data
 
 
-def parse_assignments(src: str) -> OrderedDict[str, Any]:
+def parse_assignments(src: str) -> dict[str, Any]:
     """
-    Parse top-level variable assignments from Python source and return an OrderedDict
-    of name->value.
+    Parse top-level variable assignments from Python source and return a dict of
+    name->value, in the assignments order.
     Features:
     - Handles simple Assign and AnnAssign nodes.
     - Uses ast.literal_eval for safe evaluation of literals
@@ -222,11 +246,11 @@ def parse_assignments(src: str) -> OrderedDict[str, Any]:
         Python source code as a string.
     Returns
     -------
-    OrderedDict[str, Any]
-        Ordered dictionary mapping variable names to their evaluated literal values.
+    dict[str, Any]
+        Dictionary mapping variable names to their evaluated literal values.
     """
     tree: ast.Module = ast.parse(src)
-    result: OrderedDict[str, Any] = OrderedDict()
+    result: dict[str, Any] = {}
     value: Any | None
     target: Any | None
     for node in tree.body:
@@ -251,22 +275,36 @@ def parse_assignments(src: str) -> OrderedDict[str, Any]:
     return result
 
 
-def dict_combinations(input_dict: dict) -> list[dict[str, Any]]:
+def dict_combinations(input_dict: dict) -> Iterator[dict[str, Any]]:
     """
-    Generate all combinations of values from a dictionary.
+    Lazily generate all combinations of values from a dictionary.
     Parameters
     ----------
     input_dict : dict
         Dictionary containing parameter names and their possible values.
     Returns
     -------
-    list of dict
-        List of dictionaries, each representing a unique combination of parameters.
+    Iterator of dict
+        Iterator of dictionaries, each representing a unique combination of
+        parameters.
     """
-    return [
-        dict(zip(input_dict.keys(), combo))
-        for combo in itertools.product(*input_dict.values())
-    ]
+    keys: tuple[str, ...] = tuple(input_dict)
+    return (dict(zip(keys, combo)) for combo in itertools.product(*input_dict.values()))
+
+
+def count_dict_combinations(input_dict: dict) -> int:
+    """
+    Count the combinations of values from a dictionary, without generating them.
+    Parameters
+    ----------
+    input_dict : dict
+        Dictionary containing parameter names and their possible values.
+    Returns
+    -------
+    int
+        The number of combinations generated by `dict_combinations`.
+    """
+    return prod(len(values) for values in input_dict.values())
 
 
 def get_notebook_cell_indexes_for_tag(
@@ -287,11 +325,9 @@ def get_notebook_cell_indexes_for_tag(
     return cell_indexes
 
 
-def get_notebook_parameters(
-    notebook: NotebookNode, cell_tag: str
-) -> OrderedDict[str, Any]:
+def get_notebook_parameters(notebook: NotebookNode, cell_tag: str) -> dict[str, Any]:
     """
-    Return the parameters as an ordered dictionary from the notebook's cell
+    Return the parameters as a dictionary from the notebook's cell
     tagged as `cell_tag`.
     Parameters
     ----------
@@ -305,4 +341,4 @@ def get_notebook_parameters(
         if cell_tag in cell.metadata.get("tags", []):
             cell_source: str = cell.source or ""
             return parse_assignments(cell_source)
-    return OrderedDict()
+    return {}
@@ -1,10 +1,14 @@
 import logging
-from dataclasses import dataclass
+from base64 import b64decode
+from dataclasses import dataclass, field
+from functools import cached_property
+from hashlib import blake2b
 from typing import TYPE_CHECKING, ClassVar
 
+from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.remote.webelement import WebElement
 
-from src.utils import explicit_wait, get_logger
+from src.utils import elapsed_time, explicit_wait, get_logger
 
 # Avoid circular import
 if TYPE_CHECKING:
@@ -14,19 +18,86 @@ if TYPE_CHECKING:
 logger: logging.Logger = get_logger()
 
 
-@dataclass(frozen=True, eq=False)
+@dataclass(eq=False)
 class VizElement:
     """Class representing the viz element in a Jupyter notebook."""
 
     element: WebElement
     profiler: "Profiler"
+    # The index of the cell, the digest and the time of the last screenshot taken
+    # for it
+    last_screenshot: tuple[int, bytes, float] | None = field(
+        default=None, repr=False, init=False
+    )
+    # The index of the cell and the page region of the viz element screenshots
+    screenshot_clip: tuple[int, dict[str, float]] | None = field(
+        default=None, repr=False, init=False
+    )
 
-    # Seconds to wait during the screenshots taking
+    # Min seconds between two compared screenshots, and without mutations of the
+    # viz element before taking them
     WAIT_TIME_DURING_SCREENSHOTS: ClassVar[float] = 0.5
 
+    # Max scale of the screenshots only compared, not logged, and max size in
+    # pixels of their longest side, downsampled to reduce their encoding and
+    # transfer time, which is enough to detect the viz element changes
+    SCREENSHOT_SCALE: ClassVar[float] = 0.5
+    SCREENSHOT_MAX_SIZE: ClassVar[int] = 512
+
+    # Quality of the JPEG screenshots, taken instead of PNG ones when the
+    # screenshots are only compared and not logged
+    SCREENSHOT_JPEG_QUALITY: ClassVar[int] = 80
+
+    # Size in bytes of the screenshots digests
+    SCREENSHOT_DIGEST_SIZE: ClassVar[int] = 16
+
+    # Script observing the mutations of the viz element subtree (installed once),
+    # returning the milliseconds elapsed since the last mutation, or null if the
+    # element is not displayed. The changes of the element size, position and
+    # scroll position, which are not DOM mutations, are counted as mutations too
+    MUTATIONS_SCRIPT: ClassVar[str] = """
+        const element = arguments[0];
+        const rect = element.getBoundingClientRect();
+        if (!element.isConnected || !rect.width || !rect.height) {
+            return null;
+        }
+        const geometry = [
+            rect.x,
+            rect.y,
+            rect.width,
+            rect.height,
+            element.scrollTop,
+            element.scrollLeft,
+        ].join("|");
+        if (element.__vizLastMutation === undefined) {
+            element.__vizLastMutation = 0;
+            element.__vizGeometry = geometry;
+            new MutationObserver(() => {
+                element.__vizLastMutation = performance.now();
+            }).observe(element, {
+                subtree: true,
+                childList: true,
+                attributes: true,
+                characterData: true,
+            });
+        }
+        if (geometry !== element.__vizGeometry) {
+            element.__vizGeometry = geometry;
+            element.__vizLastMutation = performance.now();
+        }
+        return performance.now() - element.__vizLastMutation;
+    """
+
     def is_stable(self, cell_index: int) -> bool:
         """
         Check if the viz element is stable (i.e., not changing).
+        A single screenshot is taken per check, and compared with the last one taken
+        for the cell, at least `WAIT_TIME_DURING_SCREENSHOTS` seconds before: the
+        first check for a cell is never stable.
+        Parameters
+        ----------
+        cell_index : int
+            The index of the cell waiting for the viz element to be stable.
         Returns
         -------
         bool
@@ -36,19 +107,148 @@ class VizElement:
             logger.debug("Viz element element is None, cannot be stable.")
             return False
 
-        # Take a screenshot of the viz element
-        screenshot_before: bytes = self.element.screenshot_as_png
+        quiet_period_ms: float = self.WAIT_TIME_DURING_SCREENSHOTS * 1000
+        try:
+            ms_since_last_mutation: float | None = self.get_ms_since_last_mutation()
+            if (
+                ms_since_last_mutation is not None
+                and ms_since_last_mutation < quiet_period_ms
+            ):
+                # The viz element has mutated recently: wait for the rest of the
+                # quiet period and check it again, rather than at the next check
+                explicit_wait((quiet_period_ms - ms_since_last_mutation) / 1000)
+                ms_since_last_mutation = self.get_ms_since_last_mutation()
+        except StaleElementReferenceException:
+            # The viz element has been removed from the page (e.g. re-rendered),
+            # let the profiler look it up again
+            logger.debug("Viz element detached from the page, cannot be stable.")
+            self.profiler.viz_element = None
+            return False
+
+        # Skip the screenshots while the viz element is not displayed
+        if ms_since_last_mutation is None:
+            logger.debug("Viz element is not displayed, cannot be stable.")
+            self.screenshot_clip = None
+            return False
+
+        # Skip the screenshots while the viz element is still being updated, the
+        # screenshots are only taken to confirm the stability of the rendering
+        if ms_since_last_mutation < quiet_period_ms:
+            logger.debug("Viz element is mutating, cannot be stable.")
+            # Look the viz element region up again once it is no longer mutating
+            self.screenshot_clip = None
+            return False
+
+        last_screenshot: tuple[int, bytes, float] | None = self.last_screenshot
+        if last_screenshot is not None and last_screenshot[0] == cell_index:
+            # Wait for the rest of the min period since the last screenshot, if
+            # the previous check was closer than that
+            remaining_time: float = self.WAIT_TIME_DURING_SCREENSHOTS - elapsed_time(
+                last_screenshot[2]
+            )
+            if remaining_time > 0:
+                explicit_wait(remaining_time)
 
-        # Wait a short period before taking another screenshot
-        explicit_wait(self.WAIT_TIME_DURING_SCREENSHOTS)
+        # Take a screenshot of the viz element, keeping only its digest
+        screenshot: bytes = self.take_screenshot(cell_index)
+        digest: bytes = self.digest(screenshot)
+        self.last_screenshot = (cell_index, digest, elapsed_time())
 
-        # Take another screenshot of the viz element
-        screenshot_after: bytes = self.element.screenshot_as_png
+        # Log screenshot
+        self.profiler.log_screenshots(cell_index, (screenshot,))
+        del screenshot
 
-        # Log screenshots
-        self.profiler.log_screenshots(cell_index, (screenshot_before, screenshot_after))
+        if last_screenshot is None or last_screenshot[0] != cell_index:
+            # First screenshot for the cell, compared at the next check
+            logger.debug("First screenshot taken for cell %s.", cell_index)
+            return False
 
-        # Compare the two screenshots
-        screenshots_are_the_same: bool = screenshot_before == screenshot_after
-        logger.debug(f"screenshots_are_the_same: {screenshots_are_the_same}.")
+        # Compare the digests of the last two screenshots
+        screenshots_are_the_same: bool = last_screenshot[1] == digest
+        logger.debug("screenshots_are_the_same: %s.", screenshots_are_the_same)
         return screenshots_are_the_same
+
+    @cached_property
+    def screenshot_format(self) -> dict[str, str | int]:
+        """
+        Get the image format of the screenshots: JPEG, cheaper to encode, unless the
+        screenshots are logged as PNG files.
+        Returns
+        -------
+        dict[str, str | int]
+            The format parameters of the DevTools screenshot command.
+        """
+        if self.profiler.screenshots_dir_path is not None:
+            return {"format": "png"}
+        return {"format": "jpeg", "quality": self.SCREENSHOT_JPEG_QUALITY}
+
+    def take_screenshot(self, cell_index: int) -> bytes:
+        """
+        Take a screenshot of the viz element, at full resolution if logged,
+        otherwise downsampled by `SCREENSHOT_SCALE` and to at most
+        `SCREENSHOT_MAX_SIZE` pixels on its longest side.
+        The page region of the viz element is looked up once per cell, and captured
+        with a single DevTools command, encoding the image with a fast compression.
+        Parameters
+        ----------
+        cell_index : int
+            The index of the cell waiting for the viz element to be stable.
+        Returns
+        -------
+        bytes
+            The screenshot of the viz element, in the `screenshot_format`.
+        """
+        if self.screenshot_clip is None or self.screenshot_clip[0] != cell_index:
+            rect: dict[str, float] = self.element.rect
+            # Take the logged screenshots at full resolution
+            scale: float = 1
+            if self.profiler.screenshots_dir_path is None:
+                # Downsample the screenshots only compared, those of the large viz
+                # elements further, down to a thumbnail of the max size
+                scale = min(
+                    self.SCREENSHOT_SCALE,
+                    self.SCREENSHOT_MAX_SIZE / max(rect["width"], rect["height"], 1),
+                )
+            self.screenshot_clip = (cell_index, {**rect, "scale": scale})
+        screenshot: dict[str, str] = self.profiler.driver.execute_cdp_cmd(
+            "Page.captureScreenshot",
+            {
+                **self.screenshot_format,
+                "clip": self.screenshot_clip[1],
+                # Favor the encoding speed over the size of the image
+                "optimizeForSpeed": True,
+            },
+        )
+        return b64decode(screenshot["data"])
+
+    def get_ms_since_last_mutation(self) -> float | None:
+        """
+        Get the milliseconds elapsed since the last mutation of the viz element
+        subtree, as observed in the page.
+        Returns
+        -------
+        float | None
+            The milliseconds elapsed since the last mutation, or None if the viz
+            element is not displayed.
+        Raises
+        ------
+        StaleElementReferenceException
+            If the viz element has been removed from the page.
+        """
+        return self.profiler.driver.execute_script(self.MUTATIONS_SCRIPT, self.element)
+
+    @classmethod
+    def digest(cls, screenshot: bytes) -> bytes:
+        """
+        Compute the digest of a screenshot, to compare it with other screenshots
+        without keeping it.
+        Parameters
+        ----------
+        screenshot : bytes
+            The screenshot to compute the digest of.
+        Returns
+        -------
+        bytes
+            The digest of the screenshot.
+        """
+        return blake2b(screenshot, digest_size=cls.SCREENSHOT_DIGEST_SIZE).digest()
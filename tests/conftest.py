@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import nbformat
+import pytest
+from nbformat.v4 import new_code_cell, new_notebook
+
+
+@pytest.fixture
+def template_path(tmp_path: Path) -> Path:
+    """Write a minimal template notebook, with a parameters cell."""
+    template_path: Path = tmp_path / "template.ipynb"
+    notebook: nbformat.NotebookNode = new_notebook(
+        cells=[
+            new_code_cell("import math"),
+            new_code_cell(
+                "a = {a_value}\nb = '{b_value}'",
+                metadata={"tags": ["parameters"]},
+            ),
+            new_code_cell("print(a, b)"),
+        ]
+    )
+    nbformat.write(notebook, template_path)
+    return template_path
@@ -0,0 +1,113 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from src.generate_notebooks import RenderedNotebook, render_notebook
+from src.notebook_generator import NotebookGenerator
+
+PARAMETERS_VALUES: dict = {"a_value": 1, "b_value": "x"}
+
+
+@pytest.fixture
+def nb_base_path(tmp_path: Path) -> Path:
+    output_dir_path: Path = tmp_path / "notebooks"
+    output_dir_path.mkdir()
+    return output_dir_path / "usecase"
+
+
+def render(
+    template_path: Path,
+    nb_base_path: Path,
+    kernel_name: str = "python3",
+    parameters_values: dict = PARAMETERS_VALUES,
+) -> RenderedNotebook:
+    return render_notebook(
+        template_path,
+        kernel_name,
+        parameters_values,
+        nb_base_path,
+        template_path.stat().st_mtime_ns,
+    )
+
+
+def test_render_notebook_paths(template_path: Path, nb_base_path: Path) -> None:
+    notebook: RenderedNotebook = render(template_path, nb_base_path)
+    assert notebook.output_path == nb_base_path.with_name("usecase-a1-bx.ipynb")
+    assert notebook.key_path == nb_base_path.with_name("usecase-a1-bx.ipynb.key")
+    assert notebook.save() == notebook.output_path
+    assert notebook.key_path.read_text() == notebook.key
+
+
+def test_same_key_when_unchanged(template_path: Path, nb_base_path: Path) -> None:
+    first: RenderedNotebook = render(template_path, nb_base_path)
+    assert first.content is not None
+    first.save()
+    second: RenderedNotebook = render(template_path, nb_base_path)
+    assert second.key == first.key
+    # The saved notebook is up to date, it is not generated again
+    assert second.content is None
+
+
+def test_new_key_when_template_changes(template_path: Path, nb_base_path: Path) -> None:
+    first: RenderedNotebook = render(template_path, nb_base_path)
+    first.save()
+    template_path.write_text(
+        template_path.read_text().replace("import math", "import cmath")
+    )
+    # Make sure the modification time changes, whatever the file system precision
+    template_mtime_ns: int = template_path.stat().st_mtime_ns + 1_000_000_000
+    os.utime(template_path, ns=(template_mtime_ns, template_mtime_ns))
+    second: RenderedNotebook = render(template_path, nb_base_path)
+    assert second.key != first.key
+    assert second.content is not None
+
+
+def test_new_key_when_generator_version_changes(
+    template_path: Path, nb_base_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first: RenderedNotebook = render(template_path, nb_base_path)
+    first.save()
+    monkeypatch.setattr(
+        NotebookGenerator, "GENERATOR_VERSION", NotebookGenerator.GENERATOR_VERSION + 1
+    )
+    second: RenderedNotebook = render(template_path, nb_base_path)
+    assert second.key != first.key
+    assert second.content is not None
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"kernel_name": "python3.12"},
+        {"parameters_values": {"a_value": 2, "b_value": "x"}},
+        {"parameters_values": {"a_value": 1, "b_value": "y"}},
+    ],
+)
+def test_new_key_when_kernel_or_parameters_change(
+    template_path: Path, nb_base_path: Path, changes: dict
+) -> None:
+    first: RenderedNotebook = render(template_path, nb_base_path)
+    first.save()
+    second: RenderedNotebook = render(template_path, nb_base_path, **changes)
+    assert second.key != first.key
+    assert second.content is not None
+
+
+def test_regenerated_when_output_missing(
+    template_path: Path, nb_base_path: Path
+) -> None:
+    first: RenderedNotebook = render(template_path, nb_base_path)
+    first.save()
+    first.output_path.unlink()
+    second: RenderedNotebook = render(template_path, nb_base_path)
+    assert second.key == first.key
+    assert second.content is not None
+    assert second.save().exists()
+
+
+def test_regenerated_when_key_missing(template_path: Path, nb_base_path: Path) -> None:
+    first: RenderedNotebook = render(template_path, nb_base_path)
+    first.save()
+    first.key_path.unlink()
+    assert render(template_path, nb_base_path).content is not None
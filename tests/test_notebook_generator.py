@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import orjson
+import pytest
+
+from src.notebook_generator import NotebookGenerator
+
+
+def test_parse_params_cell_source() -> None:
+    assert NotebookGenerator.parse_params_cell_source("a = {a}\nb = {b}\n") == (
+        ("a = ", "a", "", None),
+        ("\nb = ", "b", "", None),
+        ("\n", None, None, None),
+    )
+
+
+def test_parse_params_cell_source_escaped_braces() -> None:
+    assert NotebookGenerator.parse_params_cell_source("d = {{'a': {a}}}") == (
+        ("d = {", None, None, None),
+        ("'a': ", "a", "", None),
+        ("}", None, None, None),
+    )
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "a = {a}",
+        "a = {a!r}",
+        "a = {a:>8}",
+        "a = {a!r:>8}",
+        "a = {a:>{width}}",
+        "a = {a.__class__.__name__}",
+        "a = {d[k]}, {{a}}",
+    ],
+)
+def test_render_params_cell_source_as_str_format(source: str) -> None:
+    parameters_values: dict = {"a": "x", "width": 4, "d": {"k": 1.5}}
+    assert NotebookGenerator.render_params_cell_source(
+        NotebookGenerator.parse_params_cell_source(source), parameters_values
+    ) == source.format(**parameters_values)
+
+
+def test_render_params_cell_source_missing_parameter() -> None:
+    with pytest.raises(KeyError):
+        NotebookGenerator.render_params_cell_source(
+            NotebookGenerator.parse_params_cell_source("a = {a}"), {}
+        )
+
+
+def test_generate_fills_in_parameters(template_path: Path) -> None:
+    notebook: dict = orjson.loads(
+        NotebookGenerator(template_path, "python3").generate(
+            {"a_value": 1, "b_value": "x"}
+        )
+    )
+    params_cell: dict = notebook["cells"][1]
+    assert params_cell["source"].splitlines() == [
+        "a = 1",
+        "b = 'x'",
+        NotebookGenerator.DONE_STATEMENT,
+    ]
+    assert notebook["metadata"]["kernelspec"]["name"] == "python3"
+
+
+def test_generate_fills_in_formatted_parameters(template_path: Path) -> None:
+    template_path.write_text(
+        template_path.read_text().replace("{a_value}", "{a_value.real:.2f}")
+    )
+    notebook: dict = orjson.loads(
+        NotebookGenerator(template_path, "python3").generate(
+            {"a_value": 1, "b_value": "x"}
+        )
+    )
+    assert notebook["cells"][1]["source"].splitlines()[0] == "a = 1.00"
@@ -0,0 +1,35 @@
+import pytest
+
+from src.jupyterlab_helper import JupyterLabHelper
+from src.utils import ProfilerContext
+
+# The profiler needs the Chrome driver binary package
+pytest.importorskip("chromedriver_py")
+
+from src.profiler import Profiler  # noqa: E402
+
+
+class FakeDriver:
+    """Driver recording the page it is on, in place of a pooled Chrome driver."""
+
+    def __init__(self) -> None:
+        self.current_url: str = "http://localhost/lab/tree/notebook.ipynb"
+        self.quit_called: bool = False
+
+    def get(self, url: str) -> None:
+        self.current_url = url
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+def test_close_leaves_shared_driver_on_blank_page() -> None:
+    driver: FakeDriver = FakeDriver()
+    profiler: Profiler = Profiler(
+        ProfilerContext(kernel_name="python3", headless=True, max_wait_time=1),
+        JupyterLabHelper("http://localhost", "token"),
+        shared_driver=driver,  # type: ignore[arg-type]
+    )
+    profiler.close()
+    assert driver.current_url == "about:blank"
+    assert not driver.quit_called